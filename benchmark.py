@@ -0,0 +1,587 @@
+"""
+Benchmark offline untuk pipeline fetch -> transform di dashboard.py.
+
+Wialon diganti SyntheticWialon yang dipasang di belakang HTTP session dashboard, jadi fetch engine,
+session pool, core/batch sub-row dan decoding row berjalan seperti Load asli tanpa network.
+Setiap stage (fetch, build, stitch, parse, truncate, filter, aggregate, export) diukur waktunya,
+throughput (row/detik) dan peak RSS proses selama stage berjalan.
+
+    python benchmark.py                                    # 1k, 100k, 1M trip
+    python benchmark.py --sizes 50000 --days 5 --groups 8 --overlap 0.3 --crossover 0.1
+    python benchmark.py --sizes 10000 --latency-ms 20 --rate-limit   # latency + rate limiter produksi
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+import types
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+DASHBOARD_PATH = Path(__file__).with_name("dashboard.py")
+UI_MARKER = "# --- STREAMLIT UI ---"
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_START_DATE = date(2026, 1, 5)
+DEFAULT_TEMPLATE_ID = 17
+
+# --- SYNTHETIC WIALON ---
+WIALON_TZ = timezone(timedelta(hours=8))   # WITA, sama dengan tzOffset report dashboard
+PRODUCTION_DAY_START_HOUR = 6
+DAY_SHIFT_HOURS = (6, 18)                  # Row report "Day" untuk trip mulai 06:00 - 18:00, sisanya "Night"
+# Prefix nama grup, match dengan TARGET_GROUPS_MASKS dashboard ("MGE*", "KAI*", ...)
+GROUP_PREFIXES = ["MGE", "KAI", "SMP", "FUEL", "All Unit MGE", "JO MGE", "PRODUKSI", "SUPPORT"]
+UNIT_PREFIXES = ["GHT", "BUS", "LV", "GMT", "DT"]
+NAMED_LOCATIONS = 200
+TIMELINE_MARGIN_HOURS = 12                 # Trip di-generate juga sebelum / sesudah range (lookback, lookahead)
+
+ERROR_INVALID_SESSION = 1
+ERROR_INVALID_SERVICE = 2
+ERROR_INVALID_INPUT = 4
+ERROR_NO_REPORT = 5                        # Belum ada report result di session ini
+
+REPORT_STATUS_DONE = 4
+
+
+def format_duration(seconds):
+    """Durasi Wialon: "H:MM:SS", atau "1 day H:MM:SS" / "N days H:MM:SS" jika >= 24 jam."""
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    clock = f"{hours}:{minutes:02d}:{secs:02d}"
+    if not days:
+        return clock
+    return f"{days} day {clock}" if days == 1 else f"{days} days {clock}"
+
+
+class SyntheticWialon:
+    """
+    Responder Wialon sintetis: handle(svc, params, sid) -> object JSON untuk semua call yang dipakai dashboard
+    (token/login, core/search_items, report/cleanup_result, exec_report (+ remoteExec), get_report_status,
+    apply_report_result, get_result_rows, get_result_subrows, core/batch).
+
+    Armada: `units` unit dibagi round-robin ke `groups` grup, `overlap` (fraksi unit) juga jadi member grup
+    berikutnya. Tiap unit punya `trips_per_day` trip berurutan per production day selama `days` hari;
+    fraksi `crossover` trip terakhir hari itu menyeberang 06:00 ke hari berikutnya. Seperti Wialon asli,
+    trip dipotong ke interval report dan satu SID hanya memegang satu report result.
+    """
+    RESOURCE_ID = 1000
+    GROUP_ID_BASE = 2000
+
+    def __init__(self, units=50, groups=8, overlap=0.2, trips_per_day=24, days=1, crossover=0.05,
+                 start_date=DEFAULT_START_DATE, template_id=DEFAULT_TEMPLATE_ID, token=None, seed=1):
+        self.template_id = template_id
+        self.token = token
+        self.start_date = start_date
+        self.days = days
+        self.unit_names = [f"{UNIT_PREFIXES[i % len(UNIT_PREFIXES)]}-{i + 1:05d}" for i in range(units)]
+        self.group_names = [
+            f"{GROUP_PREFIXES[g % len(GROUP_PREFIXES)]} {g // len(GROUP_PREFIXES) + 1:02d}" for g in range(groups)
+        ]
+        self.group_members = [[] for _ in range(groups)]
+        overlapping = int(round(units * overlap))
+        for unit in range(units):
+            self.group_members[unit % groups].append(unit)
+            if unit < overlapping and groups > 1:
+                self.group_members[(unit + 1) % groups].append(unit)
+        self.group_members = [np.array(sorted(members), dtype=np.int64) for members in self.group_members]
+
+        self._generate_trips(np.random.default_rng(seed), units, trips_per_day, crossover)
+        self._sessions = {}        # sid -> report result aktif (None = belum ada)
+        self._pending = {}         # sid -> report result remoteExec yang belum di-apply
+        self._lock = threading.Lock()
+        self.call_counts = Counter()   # svc -> jumlah call; exec_report remoteExec juga di "report/exec_report:remote"
+
+    # --- DATA ---
+    def _generate_trips(self, rng, units, trips_per_day, crossover):
+        """Timeline trip per unit (tidak overlap, urut waktu); semua array urut (unit, begin)."""
+        first_day = datetime.combine(self.start_date, datetime.min.time(), WIALON_TZ).replace(hour=PRODUCTION_DAY_START_HOUR)
+        timeline_start = int(first_day.timestamp()) - TIMELINE_MARGIN_HOURS * 3600
+        total_days = self.days + 2 * math.ceil(TIMELINE_MARGIN_HOURS / 24)
+        slot = 86400 / trips_per_day
+        slots = total_days * trips_per_day
+
+        # Slot tetap per unit: mulai acak di awal slot, durasi < slot (motion + idle)
+        slot_starts = timeline_start + np.arange(slots) * slot
+        begin = slot_starts[None, :] + rng.uniform(0, 0.1, (units, slots)) * slot
+        motion = rng.uniform(0.05, 0.4, (units, slots)) * slot
+        idle = rng.uniform(0.05, 0.45, (units, slots)) * slot
+        # Crossover: trip terakhir sebelum 06:00 diperpanjang 0.5 - 3 jam melewati boundary.
+        # Slot dihitung relatif ke 06:00 (timeline mulai TIMELINE_MARGIN_HOURS lebih awal, bukan kelipatan hari)
+        last_of_day = (slot_starts - first_day.timestamp()) % 86400 > 86400 - slot - 1e-6
+        crossing = last_of_day[None, :] & (rng.random((units, slots)) < crossover)
+        idle = np.where(crossing, idle + rng.uniform(0.5, 3.0, (units, slots)) * 3600, idle)
+
+        begin = np.floor(begin).astype(np.int64)
+        motion = np.floor(motion).astype(np.int64)
+        idle = np.floor(idle).astype(np.int64)
+        # Trip setelah crossover digeser agar timeline unit tetap tidak overlap; jeda 1 - 119 detik,
+        # sebagian di bawah 1 menit, agar trip yang mulai tepat setelah trip menyeberang ikut teruji
+        gaps = rng.integers(1, 120, (units, slots))
+        for unit in np.flatnonzero(crossing.any(axis=1)):
+            for i in range(1, slots):
+                previous_end = begin[unit, i - 1] + motion[unit, i - 1] + idle[unit, i - 1]
+                if begin[unit, i] <= previous_end:
+                    begin[unit, i] = previous_end + gaps[unit, i]
+
+        self.trip_unit = np.repeat(np.arange(units, dtype=np.int64), slots)
+        self.trip_begin = begin.ravel()
+        self.trip_motion = motion.ravel()
+        self.trip_idle = idle.ravel()
+        self.trip_end = self.trip_begin + self.trip_motion + self.trip_idle
+        self.trip_km = np.round(self.trip_motion / 3600 * rng.uniform(8, 35, self.trip_begin.size), 1)
+        trips = self.trip_begin.size
+        named = rng.random((2, trips)) < np.array([[0.7], [0.3]])
+        self.trip_locations = [
+            np.where(named[k], rng.integers(0, NAMED_LOCATIONS, trips), -1 - np.arange(trips)) for k in range(2)
+        ]
+        self._coords = rng.uniform([-2.5, 115.0], [-0.5, 117.5], (trips, 2))
+
+    @property
+    def trip_count(self):
+        """
+        Trip yang masuk production window [start_date 06:00, start_date + days 06:00) menurut aturan dashboard:
+        mulai di dalam window, atau mulai sebelumnya dan masih berjalan saat window dibuka.
+        """
+        window_start = datetime.combine(self.start_date, datetime.min.time(), WIALON_TZ).replace(hour=PRODUCTION_DAY_START_HOUR)
+        window_end = window_start + timedelta(days=self.days)
+        starts_inside = (self.trip_begin >= window_start.timestamp()) & (self.trip_begin < window_end.timestamp())
+        crosses_in = (self.trip_begin < window_start.timestamp()) & (self.trip_end > window_start.timestamp())
+        return int(np.count_nonzero(starts_inside | crosses_in))
+
+    def _location(self, trip, which):
+        code = self.trip_locations[which][trip]
+        if code >= 0:
+            return {"t": f"LOC {code}", "y": 0, "x": 0}
+        lat, lon = self._coords[trip]
+        return {"t": f"{lat:.5f}, {lon:.5f}", "y": round(lat, 5), "x": round(lon, 5)}
+
+    def _build_report(self, object_id, time_from, time_to, unit_ids=None):
+        """
+        Report trip satu grup: row per (production date, shift), sub-row = trip terpotong ke interval.
+        unit_ids (reportObjectIdList): report dibatasi ke unit grup yang ada di list ini.
+        """
+        group = object_id - self.GROUP_ID_BASE
+        members = self.group_members[group] if 0 <= group < len(self.group_members) else np.arange(len(self.unit_names))
+        if unit_ids:
+            members = np.intersect1d(members, np.asarray(unit_ids, dtype=np.int64) - 1)
+        selected = np.flatnonzero(
+            np.isin(self.trip_unit, members) & (self.trip_begin < time_to) & (self.trip_end > time_from)
+        )
+        clipped_begin = np.maximum(self.trip_begin[selected], time_from)
+        order = np.argsort(clipped_begin, kind="stable")
+        selected, clipped_begin = selected[order], clipped_begin[order]
+
+        local_seconds = clipped_begin + int(WIALON_TZ.utcoffset(None).total_seconds())
+        local_hour = local_seconds // 3600 % 24
+        is_day = (local_hour >= DAY_SHIFT_HOURS[0]) & (local_hour < DAY_SHIFT_HOURS[1])
+        production_day = (local_seconds - PRODUCTION_DAY_START_HOUR * 3600) // 86400
+        rows = []
+        if selected.size:
+            boundaries = np.flatnonzero(np.diff(production_day * 2 + is_day)) + 1
+            for chunk in np.split(np.arange(selected.size), boundaries):
+                rows.append({
+                    "label": "Day" if is_day[chunk[0]] else "Night",
+                    "trips": selected[chunk],
+                    "begin": clipped_begin[chunk],
+                })
+        return {"rows": rows, "from": time_from, "to": time_to}
+
+    def _subrow(self, report, row, position):
+        trip = row["trips"][position]
+        begin = int(row["begin"][position])
+        end = min(int(self.trip_end[trip]), report["to"])
+        # Trip terpotong interval: motion/idle/jarak diskalakan proporsional
+        duration = self.trip_motion[trip] + self.trip_idle[trip]
+        ratio = (end - begin) / duration if duration else 0.0
+        motion = self.trip_motion[trip] * ratio
+        return {"c": [
+            str(position + 1),
+            self.unit_names[self.trip_unit[trip]],
+            {"t": datetime.fromtimestamp(begin, WIALON_TZ).strftime("%d.%m.%Y %H:%M:%S"), "v": begin},
+            self._location(trip, 0),
+            self._location(trip, 1),
+            format_duration(motion),
+            f"{self.trip_km[trip] * ratio:.1f} km",
+            format_duration((end - begin) - int(motion)),
+        ]}
+
+    # --- API ---
+    def login(self, params):
+        if self.token is not None and params.get("token") != self.token:
+            return {"error": ERROR_INVALID_INPUT}
+        with self._lock:
+            sid = uuid.uuid4().hex
+            self._sessions[sid] = None
+        return {"eid": sid, "user": {"nm": "benchmark"}}
+
+    def expire_session(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._pending.pop(sid, None)
+
+    def has_session(self, sid):
+        with self._lock:
+            return sid in self._sessions
+
+    def search_items(self, params):
+        spec = params.get("spec", {})
+        items_type = spec.get("itemsType")
+        mask = spec.get("propValueMask", "*")
+        if items_type == "avl_resource":
+            items = [{"id": self.RESOURCE_ID, "nm": "Benchmark Resource",
+                      "rep": {"1": {"id": self.template_id, "n": "Trips", "ct": "avl_unit_group"}}}]
+        elif items_type == "avl_unit_group":
+            items = [
+                {"id": self.GROUP_ID_BASE + g, "nm": name, "u": [int(unit) + 1 for unit in self.group_members[g]]}
+                for g, name in enumerate(self.group_names) if fnmatchcase(name, mask)
+            ]
+        elif items_type == "avl_unit":
+            items = [{"id": i + 1, "nm": name} for i, name in enumerate(self.unit_names) if fnmatchcase(name, mask)]
+        else:
+            items = []
+        return {"searchSpec": spec, "dataFlags": params.get("flags", 1), "totalItemsCount": len(items),
+                "indexFrom": 0, "indexTo": len(items), "items": items}
+
+    def _report_result(self, report):
+        tables = []
+        if report["rows"]:
+            tables.append({"name": "unit_group_trips", "label": "Trips", "rows": len(report["rows"]), "level": 2})
+        return {"reportResult": {"msgsRendered": 0, "stats": [], "tables": tables, "attachments": []}}
+
+    def handle(self, svc, params, sid=None):
+        """Jawab satu call Wialon (params sudah di-decode dari JSON)."""
+        with self._lock:
+            self.call_counts[svc] += 1
+            if svc == "report/exec_report" and params.get("remoteExec"):
+                self.call_counts["report/exec_report:remote"] += 1
+        if svc == "token/login":
+            return self.login(params)
+        with self._lock:
+            if sid not in self._sessions:
+                return {"error": ERROR_INVALID_SESSION}
+            report = self._sessions[sid]
+        if svc == "core/batch":
+            return [self.handle(call.get("svc"), call.get("params", {}), sid) for call in params.get("params", [])]
+
+        if svc == "core/search_items":
+            return self.search_items(params)
+        if svc == "report/cleanup_result":
+            with self._lock:
+                self._sessions[sid] = None
+                self._pending.pop(sid, None)
+            return {"error": 0}
+        if svc == "report/exec_report":
+            interval = params.get("interval", {})
+            report = self._build_report(
+                params.get("reportObjectId"), interval.get("from", 0), interval.get("to", 0), params.get("reportObjectIdList")
+            )
+            with self._lock:
+                if params.get("remoteExec"):
+                    self._pending[sid] = report
+                    return {}
+                self._sessions[sid] = report
+            return self._report_result(report)
+        if svc == "report/get_report_status":
+            with self._lock:
+                return {"status": REPORT_STATUS_DONE} if sid in self._pending else {"error": ERROR_NO_REPORT}
+        if svc == "report/apply_report_result":
+            with self._lock:
+                report = self._pending.pop(sid, None)
+                if report is None:
+                    return {"error": ERROR_NO_REPORT}
+                self._sessions[sid] = report
+            return self._report_result(report)
+        if svc == "report/get_result_rows":
+            if report is None:
+                return {"error": ERROR_NO_REPORT}
+            index_from = params.get("indexFrom", 0)
+            index_to = min(params.get("indexTo", index_from), len(report["rows"]))
+            return [
+                {"n": len(row["trips"]), "i1": 0, "i2": 0, "d": 0, "c": [str(i + 1), row["label"]]}
+                for i, row in enumerate(report["rows"][index_from:index_to], start=index_from)
+            ]
+        if svc == "report/get_result_subrows":
+            if report is None:
+                return {"error": ERROR_NO_REPORT}
+            row_index = params.get("rowIndex", 0)
+            if not 0 <= row_index < len(report["rows"]):
+                return {"error": ERROR_INVALID_INPUT}
+            row = report["rows"][row_index]
+            offset = params.get("offset", 0)
+            stop = min(offset + params.get("count", len(row["trips"])), len(row["trips"]))
+            return [self._subrow(report, row, position) for position in range(offset, stop)]
+        return {"error": ERROR_INVALID_SERVICE}
+
+    def handle_fields(self, fields):
+        """Jawab request HTTP Wialon (field form / query string: svc, params, sid) -> string JSON."""
+        try:
+            params = json.loads(fields.get("params") or "{}")
+        except ValueError:
+            return json.dumps({"error": ERROR_INVALID_INPUT})
+        return json.dumps(self.handle(fields.get("svc"), params, fields.get("sid")))
+
+
+# --- IN-PROCESS HTTP ---
+class _JsonResponse:
+    def __init__(self, body, status_code=200):
+        self.text = body
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class InProcessWialonSession:
+    """Pengganti requests.Session dashboard: POST/GET ke WIALON_HOST dijawab SyntheticWialon di proses ini."""
+    def __init__(self, responder, latency_seconds=0.0):
+        self.responder = responder
+        self.latency_seconds = latency_seconds
+
+    def _respond(self, fields):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return _JsonResponse(self.responder.handle_fields(fields))
+
+    def post(self, url, data=None, timeout=None):
+        return self._respond(dict(data or {}))
+
+    def get(self, url, timeout=None):
+        return self._respond(dict(parse_qsl(urlsplit(url).query)))
+
+
+# --- DASHBOARD LOADING ---
+def load_dashboard(path=DASHBOARD_PATH):
+    """Import bagian library dashboard.py (semua sebelum UI_MARKER) sebagai module, tanpa menjalankan UI."""
+    source = Path(path).read_text(encoding="utf-8")
+    library, found, _ = source.partition(UI_MARKER)
+    if not found:
+        raise RuntimeError(f"{path}: marker {UI_MARKER!r} tidak ditemukan")
+    # Di luar `streamlit run` setiap cache / st.* call me-log warning "no runtime"
+    logging.disable(logging.WARNING)
+    module = types.ModuleType("dashboard_lib")
+    module.__file__ = str(path)
+    exec(compile(library, str(path), "exec"), module.__dict__)
+    return module
+
+
+def install_responder(dashboard, responder, latency_seconds=0.0, rate_limit=False):
+    """Arahkan semua call Wialon dashboard ke responder; cache proses di-reset agar tiap run mulai bersih."""
+    dashboard.st.cache_resource.clear()
+    dashboard.st.cache_data.clear()
+    dashboard.TEMPLATE_ID = responder.template_id
+    if not rate_limit:
+        # Tanpa rate limiter produksi: yang diukur biaya pipeline, bukan token bucket
+        dashboard.RATE_LIMIT_INITIAL = dashboard.RATE_LIMIT_MAX = 1e9
+    session = InProcessWialonSession(responder, latency_seconds)
+    dashboard.get_http_session = lambda: session
+
+
+# --- MEASUREMENT ---
+def current_rss_bytes():
+    """RSS proses saat ini (Linux /proc), None jika tidak tersedia."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class PeakRssSampler:
+    """Sampling RSS di thread terpisah selama satu stage; fallback ke ru_maxrss proses jika /proc tidak ada."""
+    INTERVAL_SECONDS = 0.005
+
+    def __enter__(self):
+        self.start = current_rss_bytes()
+        self.peak = self.start or 0
+        self._stop = threading.Event()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.INTERVAL_SECONDS):
+            self.peak = max(self.peak, current_rss_bytes() or 0)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.start is None:
+            self.peak = max_rss_bytes()
+        else:
+            self._thread.join()
+            self.peak = max(self.peak, current_rss_bytes() or 0)
+
+
+def run_stage(results, name, rows, func, note=""):
+    """Jalankan satu stage, catat waktu / throughput / peak RSS, kembalikan hasil func."""
+    with PeakRssSampler() as rss:
+        started = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - started
+    row_count = rows(value) if callable(rows) else rows
+    results.append({
+        "stage": name,
+        "rows": row_count,
+        "seconds": seconds,
+        "rows_per_second": row_count / seconds if seconds > 0 else float("inf"),
+        "peak_rss_mb": rss.peak / 1e6,
+        "rss_growth_mb": (rss.peak - rss.start) / 1e6 if rss.start is not None else None,
+        "note": note,
+    })
+    return value
+
+
+def load_range(dashboard, start_date, days):
+    """Range Load + satu interval Wialon per production day, persis seperti build_trip_dataframe."""
+    start_time = dashboard.production_day_window(start_date)[0]
+    filter_end_time = dashboard.production_day_window(start_date + timedelta(days=days - 1))[1]
+    api_start_time = start_time - timedelta(hours=dashboard.API_LOOKBACK_HOURS)
+    api_end_time = filter_end_time + timedelta(hours=dashboard.API_LOOKAHEAD_HOURS)
+    production_days = dashboard.production_days_in_range(start_time, filter_end_time)
+    intervals = []
+    for day in production_days:
+        day_start, day_end = dashboard.production_day_window(day)
+        intervals.append((
+            max(api_start_time, day_start - timedelta(hours=dashboard.API_LOOKBACK_HOURS)),
+            min(api_end_time, day_end + timedelta(hours=dashboard.API_LOOKAHEAD_HOURS)),
+        ))
+    return start_time, filter_end_time, production_days, intervals
+
+
+def run_benchmark(dashboard, trips, days=3, trips_per_day=24, groups=8, overlap=0.2, crossover=0.05,
+                  latency_ms=0.0, rate_limit=False, seed=1, start_date=DEFAULT_START_DATE):
+    """Satu Load sintetis ~`trips` trip (jumlah unit menyesuaikan), diukur per stage seperti build_trip_dataframe."""
+    units = max(1, math.ceil(trips / (days * trips_per_day)))
+    responder = SyntheticWialon(units=units, groups=groups, overlap=overlap, trips_per_day=trips_per_day,
+                                days=days, crossover=crossover, start_date=start_date,
+                                template_id=dashboard.TEMPLATE_ID, seed=seed)
+    install_responder(dashboard, responder, latency_ms / 1000, rate_limit)
+
+    sid = dashboard.wialon_token_login()
+    resource_id = dashboard.get_resource_id(sid)
+    if not sid or not resource_id:
+        raise RuntimeError("Synthetic Wialon login / resource lookup failed")
+
+    start_time, filter_end_time, production_days, intervals = load_range(dashboard, start_date, days)
+    results = []
+    day_rows = run_stage(
+        results, "fetch", lambda value: sum(len(rows or []) for rows in value),
+        lambda: dashboard.fetch_interval_rows(sid, resource_id, intervals),
+        "report + sub-row + decode (termasuk synthetic server)",
+    )
+    if any(rows is None for rows in day_rows):
+        raise RuntimeError("Synthetic fetch failed for at least one production day")
+    fetched_rows = sum(len(rows) for rows in day_rows)
+
+    frames = run_stage(
+        results, "build", fetched_rows,
+        lambda: [dashboard.slice_production_day(dashboard.build_trip_frame(rows), day)
+                 for day, rows in zip(production_days, day_rows) if rows],
+        "frame + parse + dedupe + Ending_DT",
+    )
+    df = run_stage(
+        results, "stitch", len,
+        lambda: dashboard.stitch_trip_frames(frames, start_time, filter_end_time, show_toast=False),
+        "fragment + dedupe + truncation + compact",
+    )
+
+    # Micro-stage: bagian dari build / stitch, diukur terpisah
+    raw = pd.DataFrame([row for rows in day_rows for row in rows], columns=[
+        "Date", "Shift", "Group", "No", "Unit", "Beginning", "Initial Location", "Final Location",
+        "In Motion", "Mileage", "Idling"
+    ])
+    run_stage(
+        results, "parse", len(raw),
+        lambda: (dashboard.parse_duration_series(raw["In Motion"]), dashboard.parse_duration_series(raw["Idling"]),
+                 dashboard.parse_mileage_series(raw["Mileage"])),
+        "bagian dari build",
+    )
+    del raw
+    combined = pd.concat(frames, ignore_index=True)
+    run_stage(
+        results, "truncate", len(combined),
+        lambda: dashboard.apply_production_window(combined, start_time, filter_end_time, show_toast=False),
+        "bagian dari stitch",
+    )
+    del combined
+
+    filter_index = run_stage(results, "filter", len(df), lambda: dashboard.TripFilterIndex(df), "index kategori")
+    run_stage(results, "search", len(df), lambda: filter_index.filter(["Day"], [], [], "GHT"), "shift + CARI")
+    run_stage(results, "aggregate", len(df), lambda: dashboard.compute_dashboard_aggregates(df), "KPI + chart")
+    for export_format in dashboard.EXPORT_FORMATS:
+        run_stage(results, f"export_{export_format}", len(df),
+                  lambda: dashboard.build_export(df, export_format), "semua row")
+
+    memory = dashboard.trip_frame_memory_report(df)
+    return {
+        "trips": len(df),
+        "expected_trips": responder.trip_count,
+        "fetched_rows": fetched_rows,
+        "units": units,
+        "groups": groups,
+        "days": days,
+        "bytes_per_trip": memory["bytes_per_trip"],
+        "stages": results,
+    }
+
+
+def print_report(report):
+    print(f"\n== {report['trips']:,} trip (sintetis {report['expected_trips']:,}) · {report['fetched_rows']:,} row fetch · {report['units']:,} unit · "
+          f"{report['groups']} grup · {report['days']} hari · {report['bytes_per_trip']:.0f} B/trip ==")
+    print(f"{'stage':<14}{'rows':>12}{'seconds':>10}{'rows/s':>14}{'peak RSS MB':>13}{'+RSS MB':>10}  note")
+    for stage in report["stages"]:
+        growth = "-" if stage["rss_growth_mb"] is None else f"{stage['rss_growth_mb']:.0f}"
+        print(f"{stage['stage']:<14}{stage['rows']:>12,}{stage['seconds']:>10.3f}{stage['rows_per_second']:>14,.0f}"
+              f"{stage['peak_rss_mb']:>13.0f}{growth:>10}  {stage['note']}")
+    load_seconds = sum(stage["seconds"] for stage in report["stages"] if stage["stage"] in ("fetch", "build", "stitch"))
+    print(f"{'Load total':<14}{report['trips']:>12,}{load_seconds:>10.3f}{report['trips'] / load_seconds:>14,.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline pipeline fetch -> transform dashboard.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="jumlah trip per Load")
+    parser.add_argument("--days", type=int, default=3, help="production day per Load")
+    parser.add_argument("--trips-per-day", type=int, default=24, help="trip per unit per hari")
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--overlap", type=float, default=0.2, help="fraksi unit yang juga member grup lain")
+    parser.add_argument("--crossover", type=float, default=0.05, help="fraksi trip akhir hari yang melewati 06:00")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency per call Wialon")
+    parser.add_argument("--rate-limit", action="store_true", help="pakai rate limiter produksi")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="tulis hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    dashboard = load_dashboard()
+    reports = []
+    for trips in args.sizes:
+        report = run_benchmark(
+            dashboard, trips, days=args.days, trips_per_day=args.trips_per_day, groups=args.groups,
+            overlap=args.overlap, crossover=args.crossover, latency_ms=args.latency_ms,
+            rate_limit=args.rate_limit, seed=args.seed,
+        )
+        print_report(report)
+        reports.append(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,38 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from datetime import datetime, timedelta
 import pytz
 import pandas as pd
+import numpy as np
 import io
 import altair as alt
 import concurrent.futures
+import asyncio
 import pydeck as pdk
 import base64
 from pathlib import Path
 from streamlit_autorefresh import st_autorefresh
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import time
+import re
+import html
+import hashlib
+import xlsxwriter
 import threading
+import logging
+import os
+import queue
+from collections import OrderedDict
+from contextlib import contextmanager
 
 # --- GLOBAL SESSION LOCK ---
 session_lock = threading.Lock()
 
+logger = logging.getLogger(__name__)
+
 # --- HELPER: IMAGE TO BASE64 ---
 def img_to_bytes(img_path):
     try:
@@ -77,10 +93,18 @@ def configure_altair_theme():
         }
     }
 
-alt.themes.register('light_dashboard', configure_altair_theme)
-alt.themes.enable('light_dashboard')
+CHART_THEME = 'light_dashboard'
+alt.themes.register(CHART_THEME, configure_altair_theme)
+alt.themes.enable(CHART_THEME)
 
 # --- KONFIGURASI (Baca dari Streamlit Secrets atau fallback default) ---
+def get_setting(section, key, default):
+    """Baca setting opsional dari Streamlit Secrets, fallback ke default."""
+    try:
+        return st.secrets[section][key]
+    except (KeyError, FileNotFoundError):
+        return default
+
 try:
     # Untuk Streamlit Cloud - baca dari secrets
     WIALON_HOST = st.secrets["wialon"]["host"]
@@ -92,6 +116,10 @@ except (KeyError, FileNotFoundError):
     WIALON_TOKEN = "8b0f180218cc380cd02922c6cc3f0737E9A4ADC8513B979F63195B9E51BEC2195A302602"
     TEMPLATE_ID = 17
 
+# Override via environment, mis. WIALON_HOST=http://127.0.0.1:8765/wialon/ajax.html untuk mock_wialon.py
+WIALON_HOST = os.environ.get("WIALON_HOST", WIALON_HOST)
+WIALON_TOKEN = os.environ.get("WIALON_TOKEN", WIALON_TOKEN)
+
 TIMEZONE = pytz.timezone("Asia/Makassar")
 TARGET_GROUPS_MASKS = [
     "MGE*",
@@ -104,8 +132,102 @@ TARGET_GROUPS_MASKS = [
     "SUPPORT*"
 ]
 
+# --- WIALON SESSION POOL CONFIGURATION ---
+# Jumlah SID paralel untuk menjalankan report grup secara bersamaan
+WIALON_SESSION_POOL_SIZE = int(get_setting("wialon", "session_pool_size", 4))
+
+# --- FETCH ENGINE CONFIGURATION ---
+# Batas global call Wialon yang in-flight untuk seluruh proses (semua user yang Load bersamaan)
+WIALON_MAX_CONCURRENCY = int(get_setting("wialon", "max_concurrency", 16))
+# Jumlah get_result_subrows yang dibungkus dalam satu core/batch (<= 1 = tanpa batch)
+SUBROW_BATCH_SIZE = int(get_setting("wialon", "subrow_batch_size", 50))
+# Ukuran halaman get_result_rows / get_result_subrows (memory tetap kecil untuk grup besar)
+REPORT_ROWS_PAGE_SIZE = int(get_setting("wialon", "rows_page_size", 500))
+SUBROWS_PAGE_SIZE = int(get_setting("wialon", "subrows_page_size", 100))
+# Batas halaman sub-row per row (200 x 100 = 20k trip satu unit satu report); lewat batas = error, bukan dipotong
+SUBROWS_MAX_PAGES = int(get_setting("wialon", "subrows_max_pages", 200))
+# Berapa kali report yang error diulang (per interval / production day) sebelum interval dianggap gagal
+INTERVAL_FETCH_RETRIES = int(get_setting("wialon", "interval_fetch_retries", 2))
+
+# --- ASYNC REPORT EXECUTION (remoteExec + get_report_status polling) ---
+# Report dengan interval >= ambang ini dijalankan async di server Wialon (0 = selalu async).
+# Load dipecah per production day (~31 jam per report) -> selalu async, report grup besar bisa melewati
+# HTTP read timeout. Increment Live Mode (beberapa menit) cukup sync: tanpa poll, tanpa latency tambahan.
+REPORT_ASYNC_MIN_HOURS = float(get_setting("wialon", "report_async_min_hours", 2))
+# Report untuk paling banyak sekian unit (hasil planning) juga sync, berapapun panjang interval-nya
+REPORT_SYNC_MAX_UNITS = int(get_setting("wialon", "report_sync_max_units", 3))
+# Poll status pertama cepat (report kecil selesai < 1 detik), lalu jaraknya digandakan sampai interval max
+REPORT_POLL_INITIAL_SECONDS = float(get_setting("wialon", "report_poll_initial_seconds", 0.25))
+REPORT_POLL_INTERVAL_SECONDS = float(get_setting("wialon", "report_poll_interval_seconds", 2.0))
+REPORT_POLL_DEADLINE_SECONDS = float(get_setting("wialon", "report_poll_deadline_seconds", 900))
+# Bit status report/get_report_status
+REPORT_STATUS_DONE = 4
+REPORT_STATUS_FAILED = 8 | 16   # Canceled / invalid report
+REPORT_STATUS_NO_DATA = 32
+# Hasil report tanpa data (status NO_DATA pada remoteExec), bentuknya sama dengan exec_report sinkron
+EMPTY_REPORT_RESULT = {"reportResult": {"tables": []}}
+
+# --- HTTP CLIENT CONFIGURATION ---
+HTTP_CONNECT_TIMEOUT = float(get_setting("http", "connect_timeout", 10))
+HTTP_READ_TIMEOUT = float(get_setting("http", "read_timeout", 30))
+HTTP_MAX_RETRIES = int(get_setting("http", "max_retries", 3))
+HTTP_BACKOFF_FACTOR = float(get_setting("http", "backoff_factor", 0.5))
+
+# --- RATE LIMITER CONFIGURATION (AIMD token bucket) ---
+RATE_LIMIT_INITIAL = float(get_setting("rate_limit", "initial_rate", 10.0))   # call/detik
+RATE_LIMIT_MIN = float(get_setting("rate_limit", "min_rate", 1.0))
+RATE_LIMIT_MAX = float(get_setting("rate_limit", "max_rate", 50.0))
+# Latency di atas target dianggap tanda API mulai overload
+RATE_LIMIT_LATENCY_TARGET = float(get_setting("rate_limit", "latency_target_seconds", 3.0))
+# Call yang lama karena kerja report di server (bukan karena API overload) tidak dihitung ke latency
+RATE_LIMIT_LATENCY_EXEMPT_SERVICES = frozenset({"report/exec_report", "report/apply_report_result"})
+THROTTLE_MAX_RETRIES = int(get_setting("rate_limit", "max_retries", 5))
+THROTTLE_BACKOFF_SECONDS = 1.0
+THROTTLE_BACKOFF_MAX_SECONDS = 30.0
+# 1003 = "Only one request is allowed at the moment", 429 = HTTP Too Many Requests
+WIALON_THROTTLE_ERRORS = {1003, 429}
+
+# --- SHARED CACHE CONFIGURATION ---
+SHARED_CACHE_MAX_ENTRIES = int(get_setting("cache", "max_entries", 16))
+# Range yang masih berjalan (belum lewat 06:00 penutupnya) di-refresh setelah TTL ini
+OPEN_RANGE_TTL_SECONDS = int(get_setting("cache", "open_range_ttl_seconds", 300))
+# Agregat KPI/chart per (dataset, filter) yang disimpan (LRU, dipakai bersama semua session)
+AGGREGATE_CACHE_MAX_ENTRIES = int(get_setting("cache", "aggregate_max_entries", 64))
+# File export (bytes) per (dataset, filter, format); file bisa besar, jadi cache kecil saja,
+# dibatasi jumlah entry DAN total ukuran (export sebulan bisa puluhan MB per file)
+EXPORT_CACHE_MAX_ENTRIES = int(get_setting("cache", "export_max_entries", 8))
+EXPORT_CACHE_MAX_BYTES = int(get_setting("cache", "export_max_mb", 64)) * 1024 * 1024
+
+# --- PRODUCTION CALENDAR ---
+PRODUCTION_DAY_START_HOUR = int(get_setting("production", "day_start_hour", 6))   # Production Day: 06:00 - 06:00 WITA
+# Roster shift: (nama, jam mulai). Shift berlaku sampai jam mulai shift berikutnya (wrap lewat tengah malam).
+# Contoh 3 shift: [["Pagi", 6], ["Sore", 14], ["Malam", 22]]
+SHIFT_DEFINITIONS = [tuple(shift) for shift in get_setting("production", "shifts", [["Day", 6], ["Night", 18]])]
+
+# --- PRODUCTION DAY STORE (Disk) ---
+DAY_STORE_DIR = get_setting("storage", "day_store_dir", "data_cache/production_days")
+# v3: versi sebelumnya bisa menyimpan hari yang report grupnya gagal sebagian
+DAY_STORE_SCHEMA_VERSION = 3
+API_LOOKBACK_HOURS = 1          # Tarik mundur request buat catch crossover trips
+API_LOOKAHEAD_HOURS = 6         # Lebihkan request agar trip jam 05:59 pasti ke-download
+# Hari dianggap tutup (aman disimpan permanen) setelah 06:00 penutup + jeda ini
+DAY_CLOSE_GRACE_HOURS = int(get_setting("storage", "day_close_grace_hours", API_LOOKAHEAD_HOURS))
+
 # --- SCHEDULER CONFIGURATION ---
 AUTO_LOAD_HOUR = 6       # Jam target auto-load (06:xx)
+AUTO_LOAD_MAX_RETRIES = 3
+AUTO_LOAD_RETRY_DELAY_SECONDS = 10
+AUTO_LOAD_POLL_SECONDS = 60   # Interval cek jadwal di thread scheduler
+
+# --- LOAD PREVIEW CONFIGURATION ---
+# Preview progresif saat Load di-stitch ulang paling cepat tiap interval ini, dan paling sering
+# tiap PREVIEW_COST_FACTOR x durasi preview terakhir (preview tidak boleh mendominasi waktu Load)
+PREVIEW_MIN_INTERVAL_SECONDS = float(get_setting("load", "preview_min_interval_seconds", 2.0))
+PREVIEW_COST_FACTOR = 4
+
+# --- LIVE MODE CONFIGURATION (Intraday, production day berjalan) ---
+LIVE_REFRESH_SECONDS = int(get_setting("live", "refresh_seconds", 300))   # Jarak minimum antar fetch increment
+LIVE_OVERLAP_MINUTES = int(get_setting("live", "overlap_minutes", 5))     # Trip yang selesai dekat cut-off dianggap masih berjalan
 
 def get_yesterday_production_dates():
     """
@@ -115,23 +237,20 @@ def get_yesterday_production_dates():
     yesterday = today - timedelta(days=1)
     return yesterday, yesterday
 
-def should_auto_load():
+def should_auto_load(last_attempt_date, now=None):
     """
     Tentukan apakah auto-load harus dijalankan:
     1. Waktu sekarang sudah lewat jam 06:00 (tidak perlu Golden Window)
-    2. Data untuk hari ini belum di-load (cek session_state)
+    2. Auto-load untuk hari ini belum dicoba (last_attempt_date dari scheduler)
     """
-    now = datetime.now(TIMEZONE)
-    today_str = now.strftime("%Y-%m-%d")
+    now = now or datetime.now(TIMEZONE)
     
     # Cek apakah sudah lewat jam 06:00
     if now.hour < AUTO_LOAD_HOUR:
         return False
     
-    last_auto_load = st.session_state.get('last_auto_load_date', None)
-    
     # Jika sudah auto-load hari ini, skip
-    if last_auto_load == today_str:
+    if last_attempt_date == now.date():
         return False
     
     return True
@@ -164,6 +283,182 @@ def parse_mileage(mileage_str):
     except:
         return 0.0
 
+@st.cache_resource
+def get_http_session():
+    """
+    HTTP client bersama (keep-alive) untuk semua call Wialon.
+    Connection pool disesuaikan dengan jumlah worker paralel agar TLS handshake tidak diulang,
+    dengan retry + backoff untuk error transient (gagal connect / 5xx).
+    Tidak ada retry setelah request terkirim (read timeout / koneksi putus saat baca response):
+    semua call Wialon adalah POST, dan mengulang exec_report yang sebenarnya sudah jalan
+    hanya menggandakan beban report di server. Kegagalan itu dikembalikan ke caller.
+    """
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=WIALON_MAX_CONCURRENCY + WIALON_SESSION_POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# --- ADAPTIVE RATE LIMITER ---
+class AdaptiveRateLimiter:
+    """
+    Token bucket di depan semua call Wialon dengan rate adaptif (AIMD):
+    sukses dengan latency normal -> rate naik sedikit demi sedikit (additive),
+    throttle / error transport -> rate dipotong setengah (multiplicative),
+    latency di atas target -> rate diturunkan pelan-pelan (latency=None: sukses tanpa sinyal latency).
+    """
+    def __init__(self, initial_rate, min_rate, max_rate, latency_target):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.latency_target = latency_target
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._waiting = 0
+        self._success_count = 0
+        self._throttle_count = 0
+        self._latency_samples = 0
+        self._latency_ewma = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        # Kapasitas bucket = 1 detik rate, agar burst tidak melebihi rate saat ini
+        self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    self._cond.wait((1.0 - self._tokens) / self.rate)
+            finally:
+                self._waiting -= 1
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        # Satu penurunan per detik cukup; burst error dari call yang sama jangan memotong berkali-kali
+        if now - self._last_decrease >= 1.0:
+            self.rate = max(self.min_rate, self.rate * factor)
+            self._last_decrease = now
+
+    def on_success(self, latency=None):
+        with self._cond:
+            self._success_count += 1
+            if latency is not None:
+                self._latency_samples += 1
+                self._latency_ewma = latency if self._latency_samples == 1 else 0.8 * self._latency_ewma + 0.2 * latency
+            if latency is not None and latency > self.latency_target:
+                self._decrease(0.9)
+            else:
+                # Additive increase: kira-kira +1 call/detik per detik
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self._throttle_count += 1
+            self._decrease(0.5)
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "queue_depth": self._waiting,
+                "success": self._success_count,
+                "throttled": self._throttle_count,
+                "latency": self._latency_ewma
+            }
+
+@st.cache_resource
+def get_rate_limiter():
+    return AdaptiveRateLimiter(RATE_LIMIT_INITIAL, RATE_LIMIT_MIN, RATE_LIMIT_MAX, RATE_LIMIT_LATENCY_TARGET)
+
+def post_wialon(payload):
+    """
+    POST ke Wialon lewat rate limiter.
+    Call yang di-throttle (1003 / HTTP 429) di-retry dengan backoff, bukan dibuang.
+    """
+    limiter = get_rate_limiter()
+    for attempt in range(THROTTLE_MAX_RETRIES + 1):
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = get_http_session().post(WIALON_HOST, data=payload, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+            result = {"error": 429} if response.status_code == 429 else response.json()
+        except Exception:
+            # Retry transport sudah ditangani HTTPAdapter; di sini cukup turunkan rate
+            limiter.on_throttle()
+            raise
+        
+        if isinstance(result, dict) and result.get("error") in WIALON_THROTTLE_ERRORS:
+            limiter.on_throttle()
+            if attempt < THROTTLE_MAX_RETRIES:
+                time.sleep(min(THROTTLE_BACKOFF_MAX_SECONDS, THROTTLE_BACKOFF_SECONDS * 2 ** attempt))
+                continue
+            return result
+        
+        # exec_report / apply_report_result lama karena ukuran report, bukan beban API
+        latency = None if payload.get("svc") in RATE_LIMIT_LATENCY_EXEMPT_SERVICES else time.monotonic() - started
+        limiter.on_success(latency)
+        return result
+
+# --- VECTORIZED PARSERS (hasil identik dengan versi per-row di atas untuk format Wialon) ---
+# "HH:MM:SS" atau "N day HH:MM:SS" / "N days HH:MM:SS"; hanya digit ASCII ([0-9], bukan \d yang
+# juga cocok dengan digit Unicode seperti "１")
+DURATION_DAY_PATTERN = r"^\s*([+-]?[0-9]+)\s* day\s*(?:s )?\s*([+-]?[0-9]+)\s*:\s*([+-]?[0-9]+)\s*:\s*([+-]?[0-9]+)\s*$"
+DURATION_TIME_PATTERN = r"^\s*([+-]?[0-9]+)\s*:\s*([+-]?[0-9]+)\s*:\s*([+-]?[0-9]+)\s*$"
+
+def parse_duration_series(durations):
+    """
+    Versi vectorized parse_duration_to_minutes untuk satu kolom sekaligus (menit, 0.0 jika gagal).
+    Cell yang tidak valid (termasuk digit non-ASCII) jadi 0.0, tidak pernah raise.
+    """
+    text = durations.astype("string[pyarrow]")
+    has_day = text.str.contains("day", regex=False).fillna(False).to_numpy(dtype=bool)
+    to_number = lambda column: pd.to_numeric(column, errors="coerce")
+    day_form = text.str.extract(DURATION_DAY_PATTERN).apply(to_number).to_numpy(dtype="float64")
+    time_form = text.str.extract(DURATION_TIME_PATTERN).apply(to_number).to_numpy(dtype="float64")
+    
+    # String yang mengandung "day" wajib cocok format hari, selain itu format jam biasa
+    days = np.where(has_day, day_form[:, 0], 0.0)
+    hours = np.where(has_day, day_form[:, 1], time_form[:, 0])
+    minutes = np.where(has_day, day_form[:, 2], time_form[:, 1])
+    seconds = np.where(has_day, day_form[:, 3], time_form[:, 2])
+    
+    total_minutes = (days * 24 * 60) + (hours * 60) + minutes + (seconds / 60)
+    return pd.Series(np.nan_to_num(np.round(total_minutes, 2), nan=0.0), index=durations.index)
+
+def parse_mileage_series(mileages):
+    """Versi vectorized parse_mileage: "12,3 km" -> 12.3, 0.0 jika gagal."""
+    clean_str = (
+        mileages.astype("string[pyarrow]").str.lower()
+        .str.replace(" km", "", regex=False)
+        .str.replace(" ", "", regex=False)
+        .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(clean_str, errors="coerce").astype("float64").fillna(0.0)
+
 def wialon_request(action, params, sid=None, retry_on_session_error=True):
     """
     Base function for Wialon API requests.
@@ -173,33 +468,41 @@ def wialon_request(action, params, sid=None, retry_on_session_error=True):
     current_sid = sid if sid else st.session_state.get('wialon_sid')
     
     payload = {"svc": action, "params": json.dumps(params)}
-    request_url = WIALON_HOST
     if current_sid:
         payload["sid"] = current_sid
 
     try:
-        response = requests.post(request_url, data=payload, timeout=30)
-        result = response.json()
+        result = post_wialon(payload)
         
         # Detect Invalid Session (error 1)
         if isinstance(result, dict) and result.get("error") == 1 and retry_on_session_error:
-            with session_lock:
-                # Re-login to get a fresh SID
-                new_sid = login_wialon(force_login=True)
-                if new_sid:
-                    # Retry the request ONCE with the new SID
-                    return wialon_request(action, params, new_sid, retry_on_session_error=False)
+            # Re-login to get a fresh SID
+            new_sid = refresh_wialon_session(current_sid)
+            if new_sid:
+                # Retry the request ONCE with the new SID
+                return wialon_request(action, params, new_sid, retry_on_session_error=False)
         
         # Suppress error 1 warnings as they are handled. Show other errors.
         if isinstance(result, dict) and "error" in result and result["error"] != 0:
             if result["error"] != 1: # Don't warn on handled session errors
-                 st.warning(f"Wialon API Error ({action}): {result}")
+                if in_script_thread():
+                    st.warning(f"Wialon API Error ({action}): {result}")
+                else:
+                    logger.warning("Wialon API Error (%s): %s", action, result)
                  
         return result
     except Exception as e:
         # Silently fail for parallel workers if it's a known non-critical error
         return {"error": str(e)}
 
+def in_script_thread():
+    """True jika dipanggil dari thread script Streamlit; thread background (engine, scheduler) tidak punya UI."""
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+def is_wialon_error(result):
+    """True untuk response error Wialon / transport ({"error": kode atau pesan}, kode != 0)."""
+    return isinstance(result, dict) and bool(result.get("error"))
+
 def login_wialon(force_login=False):
     """
     Handles Wialon login and stores SID in session_state.
@@ -208,23 +511,124 @@ def login_wialon(force_login=False):
     if not force_login and 'wialon_sid' in st.session_state and st.session_state.wialon_sid:
         return st.session_state.wialon_sid
         
-    # Actual login request
+    sid = wialon_token_login()
+    if sid:
+        st.session_state.wialon_sid = sid
+    return sid
+
+def wialon_token_login():
+    """Login dengan token, kembalikan SID baru (tanpa menyentuh session_state)."""
     login_params = {"token": WIALON_TOKEN}
     # Direct request to avoid recursion in wialon_request
     try:
         url = f"{WIALON_HOST}?svc=token/login&params={json.dumps(login_params)}"
-        res = requests.get(url, timeout=30).json()
+        get_rate_limiter().acquire()
+        res = get_http_session().get(url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)).json()
         if "eid" in res:
-            st.session_state.wialon_sid = res["eid"]
             return res["eid"]
     except:
         pass
     return None
 
+def refresh_wialon_session(expired_sid):
+    """Ganti SID yang expired: SID milik pool diganti di pool, selain itu re-login session_state."""
+    pool = get_session_pool()
+    if pool.owns(expired_sid):
+        return pool.replace(expired_sid)
+    with session_lock:
+        return login_wialon(force_login=True)
+
 def get_valid_session():
     """Compatibility wrapper for other functions"""
     return login_wialon()
 
+# --- WIALON SESSION POOL ---
+class WialonSessionPool:
+    """
+    Pool beberapa SID Wialon (token/login) untuk menjalankan report grup secara paralel.
+    Satu session Wialon hanya bisa memegang satu report result, jadi setiap report
+    meminjam satu SID secara eksklusif dari cleanup_result sampai get_result_subrows selesai.
+    """
+    def __init__(self, size):
+        self.size = max(1, size)
+        self._free = queue.Queue()
+        self._created = 0
+        self._known = set()
+        self._replaced = {}     # SID lama (expired) -> SID pengganti
+        self._control_sid = None
+        self._lock = threading.Lock()
+
+    def owns(self, sid):
+        with self._lock:
+            return sid in self._known
+
+    def _resolve(self, sid):
+        while sid in self._replaced:
+            sid = self._replaced[sid]
+        return sid
+
+    def acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if not can_create:
+            # Pool penuh: tunggu report lain selesai
+            return self._free.get()
+        sid = wialon_token_login()
+        with self._lock:
+            if not sid:
+                self._created -= 1
+                raise RuntimeError("Wialon login failed for session pool")
+            self._known.add(sid)
+        return sid
+
+    def release(self, sid):
+        with self._lock:
+            sid = self._resolve(sid)
+        self._free.put(sid)
+
+    def replace(self, expired_sid):
+        with self._lock:
+            if expired_sid in self._replaced:
+                return self._resolve(expired_sid)
+            new_sid = wialon_token_login()
+            if new_sid:
+                self._replaced[expired_sid] = new_sid
+                self._known.add(new_sid)
+            return new_sid
+
+    @contextmanager
+    def lease(self):
+        sid = self.acquire()
+        try:
+            yield sid
+        finally:
+            self.release(sid)
+
+    def control_session(self):
+        """
+        SID milik pool untuk call non-report (lookup resource, planning grup) dari thread background.
+        Tidak pernah dipinjamkan ke report, jadi tidak memakan slot report (aman walau size=1);
+        kalau expired diganti lewat replace() seperti SID pool lainnya.
+        """
+        with self._lock:
+            if self._control_sid is None:
+                sid = wialon_token_login()
+                if not sid:
+                    raise RuntimeError("Wialon login failed for session pool")
+                self._control_sid = sid
+                self._known.add(sid)
+            return self._resolve(self._control_sid)
+
+@st.cache_resource
+def get_session_pool():
+    return WialonSessionPool(WIALON_SESSION_POOL_SIZE)
+
 @st.cache_data(ttl=3600)
 def find_id_by_name(sid, items_type, name):
     params = {
@@ -275,34 +679,77 @@ def get_value(val):
         return val.get('t', str(val))
     return str(val)
 
-def fetch_row_details(sid, row, index, time_from, group_name):
-    """Fungsi helper untuk mengambil detail sub-row secara paralel"""
+def get_row_shift_name(row):
+    raw_shift_name = get_value(row['c'][1]) if len(row['c']) > 1 else "Unknown"
+    return raw_shift_name.strip()
+
+def subrow_total(row):
+    """Jumlah sub-row menurut Wialon ('n'), None jika tidak diketahui."""
+    return row['n'] if row.get('n', 0) > 0 else None
+
+def subrow_page_params(index, offset=0, total=None):
+    """Params get_result_subrows untuk halaman berikutnya (SUBROWS_PAGE_SIZE), None jika sudah habis."""
+    if total is not None and offset >= total:
+        return None
+    count = SUBROWS_PAGE_SIZE if total is None else min(SUBROWS_PAGE_SIZE, total - offset)
+    return {
+        "tableIndex": 0,
+        "rowIndex": index,
+        "count": count,
+        "offset": offset
+    }
+
+def subrow_request_params(row, index):
+    """Params halaman pertama get_result_subrows untuk row ini, atau None jika sub-row tidak perlu di-fetch."""
+    if 'c' not in row or ('r' in row and isinstance(row['r'], list)):
+        return None
+    if ('n' in row and row['n'] > 0) or get_row_shift_name(row) in ["Day", "Night"]:
+        return subrow_page_params(index, 0, subrow_total(row))
+    return None
+
+def use_async_report(interval_seconds, unit_count=None):
+    """
+    remoteExec + polling hanya untuk report besar. Interval pendek (< REPORT_ASYNC_MIN_HOURS) atau
+    unit sedikit (<= REPORT_SYNC_MAX_UNITS, jika jumlahnya diketahui dari planning) dijalankan sync,
+    jadi tidak menunggu poll status pertama.
+    """
+    if interval_seconds < REPORT_ASYNC_MIN_HOURS * 3600:
+        return False
+    return unit_count is None or unit_count > REPORT_SYNC_MAX_UNITS
+
+def check_subrow_page(index, page_number, page, previous_page):
+    """
+    Pengaman paging sub-row tanpa 'n': server yang mengabaikan offset mengembalikan halaman penuh
+    yang sama terus-menerus. Halaman yang identik dengan sebelumnya (tidak ada row baru) atau
+    lebih dari SUBROWS_MAX_PAGES halaman -> RuntimeError, agar tidak loop / membengkak tanpa akhir.
+    """
+    if page == previous_page:
+        raise RuntimeError(f"get_result_subrows row {index}: page {page_number} repeats the previous page")
+    if page_number > SUBROWS_MAX_PAGES:
+        raise RuntimeError(f"get_result_subrows row {index}: more than {SUBROWS_MAX_PAGES} pages")
+
+def fetch_row_details(sid, row, index, time_from, group_name, prefetched_sub_rows=None, allowed_units=None):
+    """
+    Decode satu row report (Day / Night) jadi row trip.
+    Sub-row diambil fetch engine (WialonFetchEngine.fetch_subrows) dan diteruskan lewat prefetched_sub_rows.
+    allowed_units: set nama unit milik grup ini (hasil planning); unit lain dilewati.
+    """
     results = []
     if 'c' in row:
-        raw_shift_name = get_value(row['c'][1]) if len(row['c']) > 1 else "Unknown"
-        shift_name = raw_shift_name.strip()
+        shift_name = get_row_shift_name(row)
         
         sub_rows = []
         if 'r' in row and isinstance(row['r'], list):
             sub_rows = row['r']
-        elif ('n' in row and row['n'] > 0) or (shift_name in ["Day", "Night"] and not sub_rows):
-            count_to_fetch = row.get('n', 100)
-            if count_to_fetch == 0: count_to_fetch = 100
-            
-            sub_params = {
-                "tableIndex": 0,
-                "rowIndex": index,
-                "count": count_to_fetch,
-                "offset": 0
-            }
-            sub_res = wialon_request("report/get_result_subrows", sub_params, sid)
-            if isinstance(sub_res, list):
-                sub_rows = sub_res
+        elif prefetched_sub_rows is not None:
+            sub_rows = prefetched_sub_rows
         
         for sub_row in sub_rows:
             if 'c' in sub_row:
                 no = get_value(sub_row['c'][0])
                 unit_name = get_value(sub_row['c'][1])
+                if allowed_units is not None and unit_name.strip() not in allowed_units:
+                    continue
                 beginning = get_value(sub_row['c'][2])
                 initial_loc = get_value(sub_row['c'][3])
                 final_loc = get_value(sub_row['c'][4])
@@ -325,76 +772,428 @@ def fetch_row_details(sid, row, index, time_from, group_name):
                 ])
     return results
 
-def process_report(sid, group_name, time_from, time_to, template_id, resource_id):
-    group_id = find_id_by_name(sid, "avl_unit_group", group_name)
-    if not group_id:
-        return []
-    
-    ts_from = int(time_from.timestamp())
-    ts_to = int(time_to.timestamp())
-    
-    exec_params = {
-        "reportResourceId": resource_id,
-        "reportTemplateId": template_id,
-        "reportObjectId": group_id,
-        "reportObjectSecId": 0,
-        "interval": {
-            "from": ts_from,
-            "to": ts_to,
+# --- ASYNC FETCH ENGINE ---
+class WialonFetchEngine:
+    """
+    Engine fetch asyncio untuk semua Load di proses ini.
+    Satu event loop di background thread + satu semaphore global (max_concurrency) membatasi
+    jumlah call Wialon yang in-flight, berapapun jumlah user yang Load bersamaan.
+    Urutan per session dijaga: cleanup_result -> exec_report -> get_result_rows berjalan
+    berurutan di satu SID; get_result_subrows baru paralel setelah rows didapat.
+    """
+    def __init__(self, max_concurrency, session_slots):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Report hanya menunggu slot (tanpa memblok thread) sampai ada SID pool yang bebas
+        self._session_slots = asyncio.Semaphore(session_slots)
+        # Call HTTP tetap blocking (requests), dijalankan di executor berukuran tetap
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency + session_slots, thread_name_prefix="wialon-io"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="wialon-fetch-engine", daemon=True)
+        self._thread.start()
+
+    async def _blocking(self, func, *args):
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+    async def call(self, action, params, sid):
+        async with self._semaphore:
+            return await self._blocking(wialon_request, action, params, sid)
+
+    async def _fetch_subrow_batch(self, sid, chunk):
+        batch_params = {
+            "params": [{"svc": "report/get_result_subrows", "params": sub_params} for sub_params in chunk],
             "flags": 0
-        },
-        "tzOffset": 28800 # WITA (GMT+8)
-    }
-    
-    wialon_request("report/cleanup_result", {}, sid)
-    exec_res = wialon_request("report/exec_report", exec_params, sid)
-    
-    results = []
-    
-    if "reportResult" in exec_res:
-        total_rows = 0
-        if len(exec_res['reportResult']['tables']) > 0:
-            total_rows = exec_res['reportResult']['tables'][0]['rows']
-            
-        if total_rows > 0:
+        }
+        batch_res = await self.call("core/batch", batch_params, sid)
+        # Batch gagal total (error dict / jumlah tidak cocok): semua row fallback ke single call
+        if not isinstance(batch_res, list) or len(batch_res) != len(chunk):
+            return {}
+        return {
+            sub_params["rowIndex"]: sub_res
+            for sub_params, sub_res in zip(chunk, batch_res)
+            if isinstance(sub_res, list)
+        }
+
+    async def iter_result_row_pages(self, sid, total_rows):
+        """Async generator halaman get_result_rows: yield (index row pertama, rows) per REPORT_ROWS_PAGE_SIZE."""
+        index_from = 0
+        while index_from < total_rows:
             row_params = {
                 "tableIndex": 0,
-                "indexFrom": 0,
-                "indexTo": total_rows
+                "indexFrom": index_from,
+                "indexTo": min(index_from + REPORT_ROWS_PAGE_SIZE, total_rows)
             }
-            rows_res = wialon_request("report/get_result_rows", row_params, sid)
-            
-            if isinstance(rows_res, list):
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    future_to_row = {
-                        executor.submit(fetch_row_details, sid, row, i, time_from, group_name): i 
-                        for i, row in enumerate(rows_res)
-                    }
-                    for future in concurrent.futures.as_completed(future_to_row):
-                        try:
-                            data = future.result()
-                            results.extend(data)
-                        except Exception as exc:
-                            pass
-    return results
+            rows_page = await self.call("report/get_result_rows", row_params, sid)
+            # Halaman error / kosong sebelum total_rows tercapai = hasil report tidak lengkap
+            if not isinstance(rows_page, list) or not rows_page:
+                raise RuntimeError(f"get_result_rows {index_from}/{total_rows} failed: {rows_page}")
+            yield index_from, rows_page
+            index_from += len(rows_page)
+
+    async def _fetch_remaining_subrows(self, sid, row, index, first_page):
+        """Halaman sub-row berikutnya untuk row yang halaman pertamanya penuh."""
+        sub_rows = list(first_page)
+        previous_page = first_page
+        page_number = 1
+        sub_params = subrow_page_params(index, len(sub_rows), subrow_total(row))
+        while sub_params:
+            page = await self.call("report/get_result_subrows", sub_params, sid)
+            if not isinstance(page, list):
+                raise RuntimeError(f"get_result_subrows row {index} failed: {page}")
+            if not page:
+                break
+            page_number += 1
+            check_subrow_page(index, page_number, page, previous_page)
+            previous_page = page
+            sub_rows.extend(page)
+            if len(page) < sub_params["count"]:
+                break
+            sub_params = subrow_page_params(index, len(sub_rows), subrow_total(row))
+        return sub_rows
+
+    async def fetch_subrows(self, sid, rows_res, index_from=0):
+        """
+        Ambil sub-row satu halaman row via core/batch (SUBROW_BATCH_SIZE call per request).
+        Row yang gagal di batch fallback ke single get_result_subrows; row dengan sub-row lebih dari
+        SUBROWS_PAGE_SIZE dilanjutkan per halaman. Kembalikan {rowIndex: sub_rows}.
+        """
+        rows_by_index = dict(enumerate(rows_res, start=index_from))
+        sub_requests = [
+            sub_params for sub_params in (subrow_request_params(row, i) for i, row in rows_by_index.items())
+            if sub_params
+        ]
+        fetched = {}
+        if SUBROW_BATCH_SIZE > 1 and sub_requests:
+            chunks = [sub_requests[i:i + SUBROW_BATCH_SIZE] for i in range(0, len(sub_requests), SUBROW_BATCH_SIZE)]
+            for chunk_result in await asyncio.gather(*(self._fetch_subrow_batch(sid, chunk) for chunk in chunks)):
+                fetched.update(chunk_result)
+        
+        missing = [sub_params for sub_params in sub_requests if sub_params["rowIndex"] not in fetched]
+        single_results = await asyncio.gather(*(
+            self.call("report/get_result_subrows", sub_params, sid) for sub_params in missing
+        ))
+        for sub_params, sub_res in zip(missing, single_results):
+            if not isinstance(sub_res, list):
+                raise RuntimeError(f"get_result_subrows row {sub_params['rowIndex']} failed: {sub_res}")
+            fetched[sub_params["rowIndex"]] = sub_res
+        
+        # Halaman pertama penuh: masih ada sub-row berikutnya
+        full_pages = [
+            sub_params for sub_params in sub_requests
+            if len(fetched[sub_params["rowIndex"]]) >= sub_params["count"]
+            and subrow_page_params(sub_params["rowIndex"], sub_params["count"], subrow_total(rows_by_index[sub_params["rowIndex"]]))
+        ]
+        remaining_results = await asyncio.gather(*(
+            self._fetch_remaining_subrows(sid, rows_by_index[sub_params["rowIndex"]], sub_params["rowIndex"], fetched[sub_params["rowIndex"]])
+            for sub_params in full_pages
+        ))
+        for sub_params, sub_rows in zip(full_pages, remaining_results):
+            fetched[sub_params["rowIndex"]] = sub_rows
+        return fetched
+
+    async def report_rows(self, sid, group_name, time_from, time_to, template_id, resource_id, group_id=None, allowed_units=None, unit_ids=None):
+        """
+        exec_report untuk satu grup di SID ini, kembalikan row trip yang sudah di-decode.
+        unit_ids (hasil planning): report hanya dijalankan untuk unit ini (reportObjectIdList),
+        unit grup yang sudah di-assign ke grup lain tidak ikut di-download.
+        Error Wialon / timeout di tengah jalan raise RuntimeError: hasil sebagian tidak pernah
+        dikembalikan sebagai hasil lengkap ([] hanya berarti report memang tanpa data).
+        """
+        if not group_id:
+            # ID sudah diketahui dari planning; cari by name hanya untuk fallback ("*")
+            async with self._semaphore:
+                group_id = await self._blocking(find_id_by_name, sid, "avl_unit_group", group_name)
+        if not group_id:
+            return []
+        
+        ts_from = int(time_from.timestamp())
+        ts_to = int(time_to.timestamp())
+        
+        exec_params = {
+            "reportResourceId": resource_id,
+            "reportTemplateId": template_id,
+            "reportObjectId": group_id,
+            "reportObjectSecId": 0,
+            "interval": {
+                "from": ts_from,
+                "to": ts_to,
+                "flags": 0
+            },
+            "tzOffset": 28800 # WITA (GMT+8)
+        }
+        if unit_ids:
+            exec_params["reportObjectIdList"] = list(unit_ids)
+        
+        await self.call("report/cleanup_result", {}, sid)
+        if use_async_report(ts_to - ts_from, len(unit_ids) if unit_ids else None):
+            exec_res = await self.exec_report_async(exec_params, sid, group_name)
+        else:
+            exec_res = await self.call("report/exec_report", exec_params, sid)
+        if is_wialon_error(exec_res) or not isinstance(exec_res, dict) or "reportResult" not in exec_res:
+            raise RuntimeError(f"exec_report failed for {group_name}: {exec_res}")
+        
+        results = []
+        
+        tables = exec_res["reportResult"].get("tables") or []
+        total_rows = tables[0]["rows"] if tables else 0
+        
+        if total_rows > 0:
+            # Per halaman: rows + sub-row-nya di-decode lalu dibuang, JSON mentah tidak menumpuk
+            async for index_from, rows_page in self.iter_result_row_pages(sid, total_rows):
+                sub_rows_by_index = await self.fetch_subrows(sid, rows_page, index_from)
+                for i, row in enumerate(rows_page, start=index_from):
+                    try:
+                        results.extend(fetch_row_details(
+                            sid, row, i, time_from, group_name, sub_rows_by_index.get(i, []), allowed_units
+                        ))
+                    except Exception:
+                        # Row yang gagal di-decode = hasil grup tidak lengkap; jangan dibuang diam-diam
+                        logger.exception("Failed to decode report row %s of group %s", i, group_name)
+                        raise
+        return results
+
+    async def exec_report_async(self, exec_params, sid, group_name):
+        """
+        exec_report dengan remoteExec: report diproses di server Wialon, status di-poll mulai
+        REPORT_POLL_INITIAL_SECONDS (digandakan s/d REPORT_POLL_INTERVAL_SECONDS), lalu hasilnya
+        diambil via apply_report_result.
+        Jadi report panjang tidak terikat HTTP read timeout. Report tanpa data -> EMPTY_REPORT_RESULT;
+        gagal / lewat deadline -> RuntimeError.
+        """
+        exec_res = await self.call("report/exec_report", dict(exec_params, remoteExec=1), sid)
+        if is_wialon_error(exec_res):
+            raise RuntimeError(f"Async exec failed for {group_name}: {exec_res}")
+        
+        deadline = time.monotonic() + REPORT_POLL_DEADLINE_SECONDS
+        poll_delay = REPORT_POLL_INITIAL_SECONDS
+        while True:
+            await asyncio.sleep(poll_delay)
+            poll_delay = min(REPORT_POLL_INTERVAL_SECONDS, poll_delay * 2)
+            status_res = await self.call("report/get_report_status", {}, sid)
+            if is_wialon_error(status_res):
+                raise RuntimeError(f"Status poll failed for {group_name}: {status_res}")
+            try:
+                status = int(status_res.get("status", 0))
+            except (AttributeError, TypeError, ValueError):
+                status = 0
+            if status & REPORT_STATUS_DONE:
+                break
+            if status & REPORT_STATUS_NO_DATA:
+                return EMPTY_REPORT_RESULT
+            if status & REPORT_STATUS_FAILED:
+                raise RuntimeError(f"Async report failed for {group_name} (status {status})")
+            if time.monotonic() >= deadline:
+                await self.call("report/cleanup_result", {}, sid)
+                raise RuntimeError(f"Async report for {group_name} exceeded {REPORT_POLL_DEADLINE_SECONDS}s deadline")
+        
+        return await self.call("report/apply_report_result", {}, sid)
+
+    async def pooled_report_rows(self, planned_group, time_from, time_to, template_id, resource_id):
+        """report_rows dengan SID pinjaman dari session pool (satu report per SID)."""
+        group_name, group_id, allowed_units, unit_ids = planned_group
+        pool = get_session_pool()
+        async with self._session_slots:
+            sid = await self._blocking(pool.acquire)
+            try:
+                return await self.report_rows(
+                    sid, group_name, time_from, time_to, template_id, resource_id, group_id, allowed_units, unit_ids
+                )
+            finally:
+                pool.release(sid)
+
+    def run_each(self, coros, return_exceptions=False):
+        """
+        Facade sinkron streaming: jalankan semua coroutine, yield (index, hasil) sesuai urutan selesai.
+        return_exceptions=True: exception di-yield sebagai hasil agar coroutine lain tetap jalan.
+        """
+        futures = {asyncio.run_coroutine_threadsafe(coro, self._loop): i for i, coro in enumerate(coros)}
+        for future in concurrent.futures.as_completed(futures):
+            if return_exceptions and future.exception() is not None:
+                yield futures[future], future.exception()
+            else:
+                yield futures[future], future.result()
+
+@st.cache_resource
+def get_fetch_engine():
+    return WialonFetchEngine(WIALON_MAX_CONCURRENCY, WIALON_SESSION_POOL_SIZE)
+
+# --- SHARED TRIP CACHE (Process-wide, dipakai bersama semua session) ---
+class _InFlightLoad:
+    """Satu fetch yang sedang berjalan; session lain menunggu hasilnya."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SharedTripStore:
+    """
+    Store hasil Load di level proses, di-share oleh semua browser session dan kiosk.
+    Key: (production-day range, template, resource), atau ("live", day, template, resource) untuk snapshot Live Mode.
+    Populasi single-flight: N session yang minta key yang sama hanya memicu satu fetch Wialon.
+    Hasil dengan df.attrs["failed_days"] (sebagian hari gagal di-fetch) tidak di-cache.
+    """
+    def __init__(self, max_entries, open_range_ttl_seconds):
+        self.max_entries = max_entries
+        self.open_range_ttl_seconds = open_range_ttl_seconds
+        self._entries = OrderedDict()   # key -> (value, loaded_at, range_end, ttl_seconds)
+        self._in_flight = {}            # key -> _InFlightLoad
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, entry):
+        _, loaded_at, range_end, ttl_seconds = entry
+        # Range yang sudah tutup (lewat 06:00 penutup + DAY_CLOSE_GRACE_HOURS, aturan yang sama dengan
+        # is_production_day_closed) tidak akan berubah lagi; sebelum itu trip yang masih berjalan bisa bertambah
+        if loaded_at >= range_end + timedelta(hours=DAY_CLOSE_GRACE_HOURS):
+            return True
+        return (datetime.now(TIMEZONE) - loaded_at).total_seconds() < ttl_seconds
+
+    @staticmethod
+    def _is_cacheable(result):
+        # Hasil kosong / tidak lengkap tidak di-cache agar Load berikutnya bisa mencoba lagi
+        if result is None:
+            return False
+        if isinstance(result, pd.DataFrame):
+            return not result.empty and not result.attrs.get("failed_days")
+        return True
+
+    def peek(self, key):
+        """Nilai terakhir untuk key walau sudah basi (dasar fetch increment Live Mode), None jika belum ada."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def get_or_load(self, key, range_end, loader, ttl_seconds=None):
+        """
+        Kembalikan nilai untuk key, jalankan loader() hanya jika belum ada / sudah basi.
+        Pemanggil yang datang saat fetch masih berjalan akan menunggu fetch yang sama.
+        ttl_seconds: umur maksimum entry selama range masih terbuka (default open_range_ttl_seconds).
+        """
+        if ttl_seconds is None:
+            ttl_seconds = self.open_range_ttl_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                return entry[0]
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _InFlightLoad()
+                self._in_flight[key] = flight
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if flight.error is None and self._is_cacheable(flight.result):
+                    self._entries[key] = (flight.result, datetime.now(TIMEZONE), range_end, ttl_seconds)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+@st.cache_resource
+def get_trip_store():
+    return SharedTripStore(SHARED_CACHE_MAX_ENTRIES, OPEN_RANGE_TTL_SECONDS)
+
+# --- PRODUCTION DAY STORE (Persistent, satu partisi per production day) ---
+def production_day_window(day):
+    """Window [06:00, besok 06:00) WITA untuk sebuah production day."""
+    day_start = TIMEZONE.localize(datetime.combine(day, datetime.min.time())).replace(hour=PRODUCTION_DAY_START_HOUR)
+    day_end = TIMEZONE.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())).replace(hour=PRODUCTION_DAY_START_HOUR)
+    return day_start, day_end
+
+def production_days_in_range(start_time, filter_end_time):
+    """Daftar production day (date) yang dicakup oleh range DARI - SAMPAI."""
+    days = []
+    day = start_time.date()
+    while production_day_window(day)[0] < filter_end_time:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def is_production_day_closed(day):
+    """Hari sudah tutup jika sudah lewat 06:00 penutupnya + DAY_CLOSE_GRACE_HOURS."""
+    return datetime.now(TIMEZONE) >= production_day_window(day)[1] + timedelta(hours=DAY_CLOSE_GRACE_HOURS)
+
+def slice_production_day(df, day):
+    """Ambil trip milik satu partisi: mulai di [06:00 - lookback, besok 06:00)."""
+    day_start, day_end = production_day_window(day)
+    partition_start = day_start - timedelta(hours=API_LOOKBACK_HOURS)
+    mask = (df["Beginning_DT"] >= partition_start) & (df["Beginning_DT"] < day_end)
+    return df[mask].reset_index(drop=True)
+
+class ProductionDayStore:
+    """
+    Penyimpanan Parquet di disk, satu file per production day.
+    Hanya hari yang sudah tutup DAN semua report grupnya sukses yang ditulis,
+    jadi isi partisi lengkap dan tidak pernah berubah lagi.
+    """
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir) / f"v{DAY_STORE_SCHEMA_VERSION}"
+
+    def _path(self, template_id, resource_id, day):
+        return self.base_dir / f"template_{template_id}" / f"resource_{resource_id}" / f"{day.isoformat()}.parquet"
+
+    def read(self, template_id, resource_id, day):
+        path = self._path(template_id, resource_id, day)
+        if not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # File rusak / tidak terbaca: anggap belum ada, akan di-fetch ulang
+            return None
+
+    def write(self, template_id, resource_id, day, df):
+        path = self._path(template_id, resource_id, day)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)  # Atomic: session lain tidak pernah baca file setengah jadi
+        except Exception:
+            # Gagal tulis tidak fatal: hari ini di-fetch ulang di Load berikutnya
+            logger.warning("Failed to write production day %s", path, exc_info=True)
+            tmp_path.unlink(missing_ok=True)
+
+@st.cache_resource
+def get_day_store():
+    return ProductionDayStore(DAY_STORE_DIR)
 
 # --- DATA FETCHING FUNCTION (Refactored for Auto-Load) ---
-def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_time, is_auto_load=False):
+def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_time, is_auto_load=False, progress_callback=None, sid=None):
     """
-    Fungsi utama untuk fetch dan process data dari Wialon API.
-    Digunakan oleh manual Load button dan Auto-Load scheduler.
+    Fungsi utama untuk fetch dan process data dari Wialon API (manual Load button).
+    Auto-Load scheduler memakai load_trip_range langsung, tanpa UI.
+    Hasil diambil dari SharedTripStore jika session lain sudah me-load range yang sama.
     
     Args:
         start_time: datetime - Waktu mulai (jam 06:00 tanggal DARI)
         api_end_time: datetime - Waktu akhir untuk API request (lebih lebar)
         filter_end_time: datetime - Waktu akhir untuk filter data (jam 06:00 tanggal SAMPAI+1)
-        is_auto_load: bool - True jika dipanggil dari auto-load scheduler
+        is_auto_load: bool - True untuk pesan "no data" versi auto-load (toast)
+        progress_callback: callable(done, total, partial_df) - update progresif selama fetch
+        sid: str - SID Wialon milik caller; default SID session browser
     
     Returns:
         pd.DataFrame or None
     """
     # Login ke Wialon (dengan auto-refresh jika session expired)
-    sid = get_valid_session()
+    sid = sid or get_valid_session()
     if not sid:
         st.error("Login Failed")
         return None
@@ -403,12 +1202,58 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
     if not resource_id:
         st.error("Resource Not Found")
         return None
-        
-    all_data = []
-    groups_found = []
+
+    return load_trip_range(sid, resource_id, start_time, api_start_time, api_end_time, filter_end_time,
+                           is_auto_load, progress_callback)
+
+def load_trip_range(sid, resource_id, start_time, api_start_time, api_end_time, filter_end_time, is_auto_load=False, progress_callback=None, notify=None):
+    """
+    Ambil range dari SharedTripStore, atau build_trip_dataframe (single-flight) jika belum ada.
+    Tanpa login / st.error: dipakai fetch_and_process_data (UI) dan AutoLoadScheduler (background, notify sendiri).
+    """
+    cache_key = (start_time.isoformat(), filter_end_time.isoformat(), TEMPLATE_ID, resource_id)
+    return get_trip_store().get_or_load(
+        cache_key,
+        filter_end_time,
+        lambda: build_trip_dataframe(
+            sid, resource_id, start_time, api_start_time, api_end_time, filter_end_time, is_auto_load, progress_callback, notify
+        )
+    )
+
+@st.cache_data(ttl=3600)
+def get_unit_names(sid):
+    """Map unit ID -> nama unit (satu search untuk semua unit)."""
+    params = {
+        "spec": {
+            "itemsType": "avl_unit",
+            "propName": "sys_name",
+            "propValueMask": "*",
+            "sortType": "sys_name"
+        },
+        "force": 1, "flags": 1, "from": 0, "to": 0
+    }
+    res = wialon_request("core/search_items", params, sid)
+    if res and "items" in res:
+        return {item["id"]: item["nm"].strip() for item in res["items"] if "id" in item and "nm" in item}
+    return {}
+
+def plan_group_reports(sid):
+    """
+    Planning sebelum fetch: ambil grup per mask beserta membership unit-nya (field "u"),
+    lalu bagi unit secara disjoint. Setiap unit milik grup PERTAMA yang match
+    (urutan TARGET_GROUPS_MASKS), sama dengan label yang dipilih dedupe selama ini.
     
+    Returns:
+        list of (group_name, group_id, allowed_units, unit_ids)
+        - grup yang semua unitnya sudah dicakup grup sebelumnya tidak di-report sama sekali
+        - allowed_units None = ambil semua unit grup; selain itu set nama unit yang di-decode
+        - unit_ids: ID unit yang di-assign ke grup ini (dikirim sebagai reportObjectIdList, jadi
+          sub-row unit milik grup lain tidak ikut di-download); None = membership tidak diketahui
+    """
+    planned = []
     # Track queried groups to avoid redundant API calls
     queried_groups = set()
+    claimed_units = set()
     
     for mask in TARGET_GROUPS_MASKS:
         # Search for actual group names based on mask
@@ -422,6 +1267,9 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
             "force": 1, "flags": 1, "from": 0, "to": 0
         }
         res_groups = wialon_request("core/search_items", params, sid)
+        if is_wialon_error(res_groups):
+            # Mask yang gagal dicari = grupnya hilang dari hasil; jangan lanjut dengan planning sebagian
+            raise RuntimeError(f"Group search failed for {mask}: {res_groups}")
         
         if res_groups and "items" in res_groups:
             for item in res_groups["items"]:
@@ -431,26 +1279,136 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
                 
                 queried_groups.add(group_name)
                 
-                # Gunakan api_start_time dan api_end_time untuk fetch data
-                data = process_report(sid, group_name, api_start_time, api_end_time, TEMPLATE_ID, resource_id)
-                if data:
-                    all_data.extend(data)
-                    groups_found.append(f"{group_name} ({len(data)} rows)")
-
-    if not all_data:
-        # FALLBACK: If group-based fetching returns nothing, try a BROAD all-unit fetch for the entire resource
-        fallback_data = process_report(sid, "*", api_start_time, api_end_time, TEMPLATE_ID, resource_id)
-        if fallback_data:
-            all_data.extend(fallback_data)
-            groups_found.append(f"RESOURCE-ALL ({len(fallback_data)} rows)")
-
-    if not all_data:
-        if is_auto_load:
-            st.toast("⚠️ Auto-load: No data found for yesterday.")
-        else:
-            st.warning("No data found.")
-        return None
+                members = item.get("u")
+                if members is None:
+                    # Membership tidak tersedia: report apa adanya, dedupe yang menangani overlap
+                    planned.append((group_name, item.get("id"), None, None))
+                    continue
+                
+                assigned = [unit_id for unit_id in members if unit_id not in claimed_units]
+                if not assigned:
+                    continue
+                claimed_units.update(assigned)
+                planned.append((group_name, item.get("id"), assigned if len(assigned) < len(members) else None, assigned))
+    
+    # Grup yang overlap sebagian: decode hanya unit yang di-assign ke grup ini
+    # (pengaman jika server mengabaikan reportObjectIdList)
+    if any(assigned is not None for _, _, assigned, _ in planned):
+        unit_names = get_unit_names(sid)
+        resolved = []
+        for group_name, group_id, assigned, unit_ids in planned:
+            if assigned is not None:
+                if all(unit_id in unit_names for unit_id in assigned):
+                    assigned = {unit_names[unit_id] for unit_id in assigned}
+                else:
+                    assigned = None   # Nama unit tidak lengkap: jangan filter, serahkan ke dedupe
+            resolved.append((group_name, group_id, assigned, unit_ids))
+        planned = resolved
+    
+    return planned
+
+def fetch_interval_rows(sid, resource_id, intervals, on_group_rows=None):
+    """
+    Jalankan report semua grup hasil planning untuk beberapa interval sekaligus (satu run_each
+    di fetch engine, jadi semua interval x grup jalan paralel dalam batas konkurensi engine).
+    on_group_rows(interval_index, group_index, rows, done, total) dipanggil begitu satu report selesai.
+    Report yang error diulang sampai INTERVAL_FETCH_RETRIES kali; interval yang tetap gagal
+    dikembalikan sebagai None agar caller bisa me-retry interval itu saja di Load berikutnya.
     
+    Returns:
+        list per interval: list row mentah (urutan grup) atau None jika gagal
+    """
+    for attempt in range(INTERVAL_FETCH_RETRIES + 1):
+        try:
+            planned_groups = plan_group_reports(sid)
+            break
+        except RuntimeError as exc:
+            planning_error = exc
+    else:
+        logger.warning("Group planning failed", exc_info=planning_error)
+        return [None] * len(intervals)
+    engine = get_fetch_engine()
+    
+    group_results = [[None] * len(planned_groups) for _ in intervals]
+    pending = [(i, g) for i in range(len(intervals)) for g in range(len(planned_groups))]
+    total = len(pending)
+    done = 0
+    failed = {}
+    for attempt in range(INTERVAL_FETCH_RETRIES + 1):
+        if not pending:
+            break
+        # Gunakan interval per report untuk fetch data; urutan hasil mengikuti pending
+        report_coros = [
+            engine.pooled_report_rows(planned_groups[g], intervals[i][0], intervals[i][1], TEMPLATE_ID, resource_id)
+            for i, g in pending
+        ]
+        retry = []
+        for task_index, data in engine.run_each(report_coros, return_exceptions=True):
+            interval_index, group_index = pending[task_index]
+            if isinstance(data, Exception):
+                failed[interval_index] = data
+                retry.append((interval_index, group_index))
+                continue
+            group_results[interval_index][group_index] = data
+            done += 1
+            if on_group_rows:
+                on_group_rows(interval_index, group_index, data, done, total)
+        pending = retry
+    
+    failed_intervals = {interval_index for interval_index, _ in pending}
+    interval_rows = []
+    for interval_index, results in enumerate(group_results):
+        if interval_index in failed_intervals:
+            logger.warning("Interval %s failed", intervals[interval_index], exc_info=failed[interval_index])
+            interval_rows.append(None)
+            continue
+        # Hasil digabung sesuai urutan grup agar dedupe tetap memilih grup pertama yang match.
+        all_data = []
+        for data in results:
+            if data:
+                all_data.extend(data)
+        interval_rows.append(all_data)
+    
+    # FALLBACK: If group-based fetching returns nothing, try a BROAD all-unit fetch for the entire resource
+    empty_intervals = [i for i, rows in enumerate(interval_rows) if rows == []]
+    if empty_intervals:
+        fallback_coros = [
+            engine.pooled_report_rows(("*", None, None, None), intervals[i][0], intervals[i][1], TEMPLATE_ID, resource_id)
+            for i in empty_intervals
+        ]
+        for task_index, fallback_data in engine.run_each(fallback_coros, return_exceptions=True):
+            interval_index = empty_intervals[task_index]
+            if isinstance(fallback_data, Exception):
+                # "Kosong" belum terbukti: jangan tampilkan / simpan sebagai hari tanpa data
+                logger.warning("Fallback fetch for %s failed", intervals[interval_index], exc_info=fallback_data)
+                interval_rows[interval_index] = None
+                continue
+            if not fallback_data:
+                continue
+            interval_rows[interval_index] = fallback_data
+            if on_group_rows:
+                on_group_rows(interval_index, len(planned_groups), fallback_data, total, total)
+    
+    return interval_rows
+
+def fetch_group_rows(sid, resource_id, api_start_time, api_end_time, on_group_rows=None):
+    """
+    Jalankan report untuk semua grup hasil planning pada satu interval, kembalikan list row mentah (urutan grup).
+    on_group_rows(group_index, rows, done, total) dipanggil begitu report satu grup selesai,
+    sehingga caller bisa memproses data secara streaming.
+    """
+    def on_interval_group_rows(_, group_index, rows, done, total):
+        on_group_rows(group_index, rows, done, total)
+    
+    rows = fetch_interval_rows(
+        sid, resource_id, [(api_start_time, api_end_time)], on_interval_group_rows if on_group_rows else None
+    )[0]
+    if rows is None:
+        raise RuntimeError(f"Wialon fetch failed for {api_start_time} - {api_end_time}")
+    return rows
+
+def build_trip_frame(all_data):
+    """Bangun DataFrame trip dari row mentah: parse waktu, dedupe lintas grup, hitung Ending_DT."""
     # Create DataFrame
     df = pd.DataFrame(all_data, columns=[
         "Date", "Shift", "Group", "No", "Unit", 
@@ -479,12 +1437,48 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
     # (Pemberian label Shift dan Tanggal dipindah ke bawah setelah Truncation agar akurat)
     
     # 6.5 HITUNG ENDING_DT (Untuk cek trip yang menyeberang boundary)
+    # Parse durasi sekali per kolom (vectorized), dipakai lagi untuk Idling/Motion (Jam)
+    df["Motion_Jam"] = parse_duration_series(df["In Motion"]) / 60
+    df["Idle_Jam"] = parse_duration_series(df["Idling"]) / 60
     # Gunakan Total = Motion + Idle sebagai durasi trip (dalam jam)
-    df["Duration_Jam"] = (df["In Motion"].apply(parse_duration_to_minutes) / 60) + \
-                         (df["Idling"].apply(parse_duration_to_minutes) / 60)
+    df["Duration_Jam"] = df["Motion_Jam"] + df["Idle_Jam"]
     
     df["Ending_DT"] = df["Beginning_DT"] + pd.to_timedelta(df["Duration_Jam"], unit='h')
+    return df
 
+def tag_production_calendar(timestamps, day_start_hour=PRODUCTION_DAY_START_HOUR, shifts=SHIFT_DEFINITIONS):
+    """
+    Label production date dan shift untuk satu kolom datetime (vectorized).
+    - Date: jam sebelum day_start_hour masih milik production day kemarin
+    - Shift: shift terakhir yang jam mulainya <= jam trip; sebelum shift pertama = shift terakhir (wrap)
+    NaT menghasilkan Date "" dan Shift "Unknown".
+    
+    Returns:
+        (date_labels, shift_labels) - dua pd.Series dengan index yang sama
+    """
+    is_missing = timestamps.isna().to_numpy()
+    
+    # 1. Date: geser mundur day_start_hour lalu ambil tanggalnya.
+    #    Format hanya nilai unik (jumlah hari sedikit), lalu petakan balik ke semua row.
+    work_day = (timestamps - pd.Timedelta(hours=day_start_hour)).dt.normalize()
+    day_codes, unique_days = pd.factorize(work_day)
+    day_labels = np.append(np.asarray(unique_days.strftime("%Y-%m-%d"), dtype=object), "")
+    date_labels = pd.Series(day_labels[day_codes], index=timestamps.index)
+    
+    # 2. Shift berdasarkan jam (pecahan) dalam hari
+    ordered_shifts = sorted(shifts, key=lambda shift: shift[1])
+    shift_starts = np.array([start_hour for _, start_hour in ordered_shifts], dtype="float64")
+    shift_names = np.array([name for name, _ in ordered_shifts] + ["Unknown"], dtype=object)
+    hour_of_day = (timestamps.dt.hour + timestamps.dt.minute / 60).to_numpy(dtype="float64", na_value=np.nan)
+    shift_index = np.searchsorted(shift_starts, hour_of_day, side="right") - 1
+    shift_index = np.where(shift_index < 0, len(ordered_shifts) - 1, shift_index)
+    shift_index = np.where(is_missing, len(ordered_shifts), shift_index)
+    shift_labels = pd.Series(shift_names[shift_index], index=timestamps.index)
+    
+    return date_labels, shift_labels
+
+def apply_production_window(df, start_time, filter_end_time, day_start_hour=PRODUCTION_DAY_START_HOUR, shifts=SHIFT_DEFINITIONS, show_toast=True):
+    """Filter dan truncate trip ke production window 06:00 - 06:00, lalu tag ulang Date/Shift."""
     # ===== STRICT FILTERING (Production Day 06:00 - 06:00) =====
     if not df.empty:
         original_count = len(df)
@@ -500,9 +1494,9 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
         df = df[mask_in_window].copy()
         
         # === NEW: STRICT BOUNDARY TRUNCATION ===
-        # Truncate Beginning_DT and Ending_DT to the production window
-        df["Effective_Start"] = df["Beginning_DT"].apply(lambda x: max(x, start_time))
-        df["Effective_End"] = df["Ending_DT"].apply(lambda x: min(x, filter_end_time))
+        # Truncate Beginning_DT and Ending_DT to the production window (vectorized)
+        df["Effective_Start"] = df["Beginning_DT"].where(df["Beginning_DT"] >= start_time, start_time)
+        df["Effective_End"] = df["Ending_DT"].where(df["Ending_DT"] <= filter_end_time, filter_end_time)
         
         # Calculate how much of the original event duration actually falls within the 06:00-06:00 window
         df["Original_Duration_Jam"] = (df["Ending_DT"] - df["Beginning_DT"]).dt.total_seconds() / 3600
@@ -510,36 +1504,19 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
         
         # Guard against zero original duration
         df["In_Window_Duration_Jam"] = df["In_Window_Duration_Jam"].clip(lower=0)
-        df["Truncation_Ratio"] = df.apply(
-            lambda x: x["In_Window_Duration_Jam"] / x["Original_Duration_Jam"] if x["Original_Duration_Jam"] > 0 else 0, 
-            axis=1
+        has_duration = df["Original_Duration_Jam"] > 0
+        df["Truncation_Ratio"] = (
+            df["In_Window_Duration_Jam"].where(has_duration, 0.0) / df["Original_Duration_Jam"].where(has_duration, 1.0)
         )
         
         # === RE-TAGGING DATE & SHIFT BASED ON EFFECTIVE START ===
-        # Gunakan jam "Efektif" (setelah truncation) untuk pelabelan yang akurat
-        # 1. Date (Production Date): Karena sudah di dalam window 06-06, 
-        #    kita bisa langsung pakai tanggal dari start_time yang dipilih user.
-        #    Atau secara dinamis mengikuti Effective_Start.
-        def get_work_day(dt):
-            if pd.isna(dt): return ""
-            # Jika jam < 06:00, berarti masih bagian dari Work Day kemarin (Night Shift)
-            if dt.hour < 6:
-                return (dt - timedelta(days=1)).strftime("%Y-%m-%d")
-            else:
-                return dt.strftime("%Y-%m-%d")
-                
-        df["Date"] = df["Effective_Start"].apply(get_work_day)
-        
-        # 2. Shift (Day 06-18, Night 18-06)
-        def get_work_shift(dt):
-            if pd.isna(dt): return "Unknown"
-            return "Day" if 6 <= dt.hour < 18 else "Night"
-            
-        df["Shift"] = df["Effective_Start"].apply(get_work_shift)
+        # Gunakan jam "Efektif" (setelah truncation) untuk pelabelan yang akurat.
+        # Jam sebelum 06:00 masih bagian dari Work Day kemarin (Night Shift).
+        df["Date"], df["Shift"] = tag_production_calendar(df["Effective_Start"], day_start_hour, shifts)
         
         filtered_count = len(df)
         
-        if original_count != filtered_count:
+        if original_count != filtered_count and show_toast:
             st.toast(f"🔍 Filtered out {original_count - filtered_count} overlap rows")
 
     # SORTING (Day Shift sebelum Night Shift)
@@ -554,16 +1531,899 @@ def fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_
     # Perhitungan Idling dan Motion menggunakan Truncation_Ratio jika ada
     # Ini memastikan hanya waktu yang BENAR-BENAR dalam window yang dihitung
     if "Truncation_Ratio" in df.columns:
-        df["Idling (Jam)"] = (df["Idling"].apply(parse_duration_to_minutes) / 60) * df["Truncation_Ratio"]
-        df["Motion (Jam)"] = (df["In Motion"].apply(parse_duration_to_minutes) / 60) * df["Truncation_Ratio"]
+        df["Idling (Jam)"] = df["Idle_Jam"] * df["Truncation_Ratio"]
+        df["Motion (Jam)"] = df["Motion_Jam"] * df["Truncation_Ratio"]
     else:
-        df["Idling (Jam)"] = df["Idling"].apply(parse_duration_to_minutes) / 60
-        df["Motion (Jam)"] = df["In Motion"].apply(parse_duration_to_minutes) / 60
+        df["Idling (Jam)"] = df["Idle_Jam"]
+        df["Motion (Jam)"] = df["Motion_Jam"]
+        
+    df["Mileage (km)"] = parse_mileage_series(df["Mileage"])
+    
+    return df
+
+def drop_boundary_fragments(df, incoming):
+    """
+    Buang potongan trip di incoming: row yang mulai TEPAT di awal interval request partisi
+    (06:00 - lookback) di tengah trip unit yang sama di df.
+    Report per production day memotong trip yang masih berjalan di awal interval request;
+    potongan itu duplikat dari trip utuh milik partisi sebelumnya. Trip lain tidak pernah dibuang,
+    walau mulai tepat setelah trip partisi sebelumnya selesai.
+    """
+    if df.empty or incoming.empty:
+        return incoming
+    previous = df[["Unit", "Beginning_DT", "Ending_DT"]].dropna(subset=["Beginning_DT"]).sort_values("Beginning_DT")
+    # Potongan hanya mungkin di awal interval request: Beginning_DT + lookback tepat jam mulai production day
+    shifted = incoming["Beginning_DT"] + pd.Timedelta(hours=API_LOOKBACK_HOURS)
+    at_request_start = (shifted - shifted.dt.normalize()) == pd.Timedelta(hours=PRODUCTION_DAY_START_HOUR)
+    candidates = incoming.loc[at_request_start, ["Unit", "Beginning_DT"]]
+    if candidates.empty:
+        return incoming
+    candidates = candidates.reset_index().sort_values("Beginning_DT")
+    matched = pd.merge_asof(
+        candidates, previous.rename(columns={"Beginning_DT": "Previous_Beginning_DT"}),
+        left_on="Beginning_DT", right_on="Previous_Beginning_DT", by="Unit",
+        direction="backward", allow_exact_matches=False,
+    )
+    # Potongan = trip partisi sebelumnya masih berjalan saat interval request dimulai
+    fragment_index = matched.loc[matched["Beginning_DT"] < matched["Ending_DT"], "index"]
+    return incoming.drop(index=fragment_index)
+
+# --- COMPACT TRIP FRAME (Skema hemat memory untuk frame yang ditampilkan) ---
+# Target memory frame compact per trip, termasuk dictionary kategori (lihat trip_frame_memory_report)
+TRIP_BYTES_TARGET = 96
+BEGINNING_FORMAT = "%d.%m.%Y %H:%M:%S"
+COMPACT_CATEGORY_COLUMNS = [
+    "Date", "Shift", "Group", "Unit", "Initial Location", "Final Location",
+    "In Motion", "Mileage", "Idling"   # String mentah Wialon: kategori (exact), bukan dibentuk ulang dari angka
+]
+COMPACT_FLOAT_COLUMNS = ["Idling (Jam)", "Motion (Jam)", "Mileage (km)"]
+
+def compact_trip_frame(df):
+    """
+    Frame hasil production window dalam skema compact: kategori untuk kolom teks, float32 untuk jam/km,
+    Beginning sebagai epoch detik waktu lokal (Beginning_TS). Kolom helper truncation tidak dibawa.
+    Frame ini di-share antar session (SharedTripStore / scheduler), jadi perlakukan sebagai read-only.
+    """
+    beginning = pd.to_datetime(df["Beginning"].str.strip(), format=BEGINNING_FORMAT, errors="coerce")
+    compact = pd.DataFrame({column: df[column].astype("category") for column in COMPACT_CATEGORY_COLUMNS})
+    compact["Beginning_TS"] = beginning.astype("datetime64[s]").astype("int64")
+    for column in COMPACT_FLOAT_COLUMNS:
+        compact[column] = df[column].astype("float32")
+    return compact
+
+def beginning_text(df):
+    """String Beginning (format Wialon) dibentuk ulang dari Beginning_TS, hanya untuk tabel / export."""
+    return pd.to_datetime(df["Beginning_TS"], unit="s").dt.strftime(BEGINNING_FORMAT)
+
+def beginning_hour(df):
+    """Jam mulai trip (0-23, waktu lokal) langsung dari Beginning_TS."""
+    return df["Beginning_TS"] // 3600 % 24
+
+def trip_frame_memory_report(df):
+    """Pemakaian memory frame trip: total, per trip (vs TRIP_BYTES_TARGET) dan per kolom."""
+    column_bytes = df.memory_usage(deep=True, index=True)
+    total_bytes = int(column_bytes.sum())
+    return {
+        "rows": len(df),
+        "total_bytes": total_bytes,
+        "bytes_per_trip": total_bytes / len(df) if len(df) else 0.0,
+        "target_bytes_per_trip": TRIP_BYTES_TARGET,
+        "columns": column_bytes.sort_values(ascending=False),
+    }
+
+def stitch_trip_frames(trip_frames, start_time, filter_end_time, show_toast=True):
+    """Gabung frame trip (urutan prioritas), buang potongan trip di batas partisi, dedupe Unit+Beginning, terapkan production window lalu compact."""
+    df = trip_frames[0]
+    for frame in trip_frames[1:]:
+        df = pd.concat([df, drop_boundary_fragments(df, frame)], ignore_index=True)
+    # Duplikat Unit+Beginning: ambil versi terpanjang (partisi lain bisa memotongnya di akhir request),
+    # sama panjang -> yang pertama (urutan prioritas), lalu urutan asli dikembalikan
+    longest = df.sort_values("Duration_Jam", ascending=False, kind="stable").drop_duplicates(subset=["Unit", "Beginning_DT"])
+    df = df.loc[longest.index.sort_values()].reset_index(drop=True)
+    return compact_trip_frame(apply_production_window(df, start_time, filter_end_time, show_toast=show_toast))
+
+def build_trip_dataframe(sid, resource_id, start_time, api_start_time, api_end_time, filter_end_time, is_auto_load=False, progress_callback=None, notify=None):
+    """
+    Bangun DataFrame trip untuk production window.
+    Production day yang sudah tutup dibaca dari ProductionDayStore (disk);
+    hanya hari yang belum tersimpan / masih berjalan yang di-fetch dari Wialon.
+    Row tiap grup di-transform begitu report-nya selesai; progress_callback(done, total, partial_df)
+    menerima hasil sementara untuk ditampilkan selagi Load berjalan (partial_df None = hanya progress,
+    preview di-throttle sesuai PREVIEW_MIN_INTERVAL_SECONDS / PREVIEW_COST_FACTOR).
+    notify(message): tujuan pesan (hari gagal / tanpa data); None = tampil di Streamlit.
+    """
+    day_store = get_day_store()
+    days = production_days_in_range(start_time, filter_end_time)
+    
+    frames = {}
+    missing_days = []
+    failed_days = []
+    for day in days:
+        day_df = day_store.read(TEMPLATE_ID, resource_id, day)
+        if day_df is None:
+            missing_days.append(day)
+        else:
+            frames[day] = day_df
+    
+    if missing_days:
+        # Satu interval Wialon per production day yang belum ada di disk, semua dijalankan paralel.
+        # Tiap interval: [06:00 - lookback, besok 06:00 + lookahead], dibatasi range API.
+        intervals = []
+        for day in missing_days:
+            day_start, day_end = production_day_window(day)
+            intervals.append((
+                max(api_start_time, day_start - timedelta(hours=API_LOOKBACK_HOURS)),
+                min(api_end_time, day_end + timedelta(hours=API_LOOKAHEAD_HOURS)),
+            ))
         
-    df["Mileage (km)"] = df["Mileage"].apply(parse_mileage)
+        group_frames = {}
+        next_preview_at = 0.0
+        
+        def on_group_rows(day_index, group_index, rows, done, total):
+            nonlocal next_preview_at
+            # Transform per grup begitu datang, tidak menunggu semua grup selesai
+            if rows:
+                group_frames[(day_index, group_index)] = build_trip_frame(rows)
+            if not progress_callback:
+                return
+            started = time.monotonic()
+            if done >= total or started < next_preview_at:
+                # Stitch ulang semua frame itu mahal: di antara preview cukup update progress.
+                # Report terakhir tidak perlu preview, hasil lengkap di-stitch sekali setelah ini.
+                progress_callback(done, total, None)
+                return
+            partial_frames = [frames[day] for day in days if day in frames]
+            partial_frames += [group_frames[key] for key in sorted(group_frames)]
+            partial_frames = [frame for frame in partial_frames if not frame.empty]
+            partial_df = stitch_trip_frames(partial_frames, start_time, filter_end_time, show_toast=False) if partial_frames else None
+            progress_callback(done, total, partial_df)
+            preview_seconds = time.monotonic() - started
+            next_preview_at = time.monotonic() + max(PREVIEW_MIN_INTERVAL_SECONDS, PREVIEW_COST_FACTOR * preview_seconds)
+        
+        day_rows = fetch_interval_rows(sid, resource_id, intervals, on_group_rows)
+        
+        for day, rows in zip(missing_days, day_rows):
+            if rows is None:
+                # Ada report grup yang gagal: hari ini tidak lengkap, tidak disimpan,
+                # Load berikutnya hanya fetch ulang hari ini saja
+                failed_days.append(day)
+                continue
+            if not rows:
+                continue
+            # Urutan grup dipertahankan (build_trip_frame) agar dedupe tetap memilih grup pertama yang match
+            day_df = slice_production_day(build_trip_frame(rows), day)
+            frames[day] = day_df
+            # rows bukan None = semua grup hasil planning sukses (fetch_interval_rows)
+            if is_production_day_closed(day):
+                day_store.write(TEMPLATE_ID, resource_id, day, day_df)
+        
+        if failed_days:
+            (notify or st.warning)(f"⚠️ Gagal fetch production day: {', '.join(str(day) for day in failed_days)}. Klik Load lagi untuk retry.")
+    
+    day_frames = [frames[day] for day in days if day in frames and not frames[day].empty]
+    if not day_frames:
+        if notify:
+            notify("No data found.")
+        elif is_auto_load:
+            st.toast("⚠️ Auto-load: No data found for yesterday.")
+        else:
+            st.warning("No data found.")
+        return None
     
+    # Partisi bersebelahan overlap 1 jam (lookback), dedupe lagi setelah digabung
+    df = stitch_trip_frames(day_frames, start_time, filter_end_time, show_toast=notify is None)
+    # Tanda hasil tidak lengkap: SharedTripStore tidak meng-cache-nya untuk session lain
+    df.attrs["failed_days"] = failed_days
     return df
 
+# --- LIVE MODE (Incremental fetch untuk production day berjalan) ---
+def current_production_day(now=None):
+    """Production day yang sedang berjalan (jam sebelum 06:00 masih milik hari kemarin)."""
+    now = now or datetime.now(TIMEZONE)
+    return (now - timedelta(hours=PRODUCTION_DAY_START_HOUR)).date()
+
+def fetch_live_increment(sid, resource_id, live_state=None, now=None):
+    """
+    Fetch hanya interval sejak cut-off terakhir lalu gabungkan ke frame trip hari berjalan.
+    Trip yang masih berjalan saat cut-off sebelumnya (Ending_DT dekat cut-off) dibuang
+    dan di-fetch ulang utuh, jadi durasinya tidak terpotong di cut-off lama.
+    
+    Returns:
+        (live_state, df) - live_state: dict day / trips (frame pra-window) / fetched_until,
+        df: hasil production window siap tampil (None jika belum ada trip).
+        Jika fetch gagal, live_state lama dikembalikan apa adanya (objek yang sama) dengan df None.
+    """
+    now = now or datetime.now(TIMEZONE)
+    day = current_production_day(now)
+    day_start, day_end = production_day_window(day)
+    
+    live_start = day_start - timedelta(hours=API_LOOKBACK_HOURS)
+    if live_state is None or live_state["day"] != day:
+        # Hari baru (atau belum pernah load): fetch dari awal production day
+        kept_trips = None
+        fetch_from = request_from = live_start
+    else:
+        trips = live_state["trips"]
+        cutoff = live_state["fetched_until"]
+        open_mask = trips["Ending_DT"] >= cutoff - timedelta(minutes=LIVE_OVERLAP_MINUTES)
+        fetch_from = cutoff - timedelta(minutes=LIVE_OVERLAP_MINUTES)
+        if open_mask.any():
+            fetch_from = min(fetch_from, trips.loc[open_mask, "Beginning_DT"].min())
+        kept_trips = trips[~open_mask]
+        # Request dimulai sedikit lebih awal; trip yang mulai sebelum fetch_from (terpotong batas request)
+        # dibuang karena versi utuhnya sudah ada di kept_trips
+        request_from = max(fetch_from - timedelta(minutes=LIVE_OVERLAP_MINUTES), live_start)
+    
+    try:
+        rows = fetch_group_rows(sid, resource_id, request_from, now)
+    except RuntimeError:
+        # Increment gagal: pertahankan data terakhir, dicoba lagi di refresh berikutnya
+        logger.exception("Live increment from %s failed", request_from)
+        st.warning("⚠️ Live update gagal, menampilkan data terakhir. Dicoba lagi di refresh berikutnya.")
+        return live_state, None
+    
+    trip_frames = [kept_trips] if kept_trips is not None and not kept_trips.empty else []
+    if rows:
+        new_trips = build_trip_frame(rows)
+        if kept_trips is not None:
+            new_trips = new_trips[new_trips["Beginning_DT"] >= fetch_from]
+        trip_frames.append(new_trips)
+    
+    if trip_frames:
+        trips = pd.concat(trip_frames, ignore_index=True)
+        trips = trips.drop_duplicates(subset=["Unit", "Beginning_DT"]).reset_index(drop=True)
+    else:
+        trips = build_trip_frame([])
+    
+    live_state = {"day": day, "trips": trips, "fetched_until": now}
+    if trips.empty:
+        return live_state, None
+    return live_state, compact_trip_frame(apply_production_window(trips, day_start, day_end, show_toast=False))
+
+def get_live_snapshot(now=None):
+    """
+    Snapshot Live Mode yang di-share semua session / kiosk lewat SharedTripStore.
+    Paling banyak satu fetch increment per LIVE_REFRESH_SECONDS per production day (single-flight),
+    dibangun dari snapshot bersama sebelumnya. Jika increment gagal, snapshot lama dipakai lagi
+    sampai refresh berikutnya.
+    
+    Returns:
+        dict state (live_state, None jika belum pernah sukses) / df, atau None jika login gagal.
+    """
+    now = now or datetime.now(TIMEZONE)
+    day = current_production_day(now)
+    
+    sid = get_valid_session()
+    if not sid:
+        st.error("Login Failed")
+        return None
+    
+    resource_id = get_resource_id(sid)
+    if not resource_id:
+        st.error("Resource Not Found")
+        return None
+    
+    store = get_trip_store()
+    cache_key = ("live", day.isoformat(), TEMPLATE_ID, resource_id)
+    
+    def refresh():
+        previous = store.peek(cache_key) or {"state": None, "df": None}
+        live_state, df = fetch_live_increment(sid, resource_id, previous["state"], now)
+        if live_state is previous["state"]:
+            # Gagal: simpan ulang snapshot lama, kiosk lain tidak ikut mencoba sebelum LIVE_REFRESH_SECONDS
+            return previous
+        return {"state": live_state, "df": df}
+    
+    return store.get_or_load(cache_key, production_day_window(day)[1], refresh, ttl_seconds=LIVE_REFRESH_SECONDS)
+
+# --- BACKGROUND AUTO-LOAD SCHEDULER (satu thread per server, lepas dari browser session) ---
+class AutoLoadScheduler:
+    """
+    Jalankan auto-load H-1 setelah jam 06:00 WITA di thread background, lengkap dengan retry.
+    Hasilnya masuk SharedTripStore / ProductionDayStore; session browser cukup ambil latest().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_attempt_date = None   # Tanggal kalender percobaan auto-load terakhir
+        self.status = "Monitoring Aktif"
+        self.last_error = None          # Pesan error attempt terakhir yang gagal (ditampilkan di sidebar)
+        self._result = None             # {"loaded_on", "production_date", "df"}
+        self._thread = threading.Thread(target=self._run, name="auto-load-scheduler", daemon=True)
+        self._thread.start()
+
+    def latest(self):
+        with self._lock:
+            return self._result
+
+    def _set_status(self, status):
+        with self._lock:
+            self.status = status
+
+    def _set_error(self, error, exc_info=False):
+        # exc_info=True dari blok except: traceback ikut ke log, sidebar cukup pesan singkat
+        logger.error("Auto-load scheduler: %s", error, exc_info=exc_info)
+        with self._lock:
+            self.last_error = f"{datetime.now(TIMEZONE).strftime('%H:%M')} {error}"
+
+    def _run(self):
+        while True:
+            try:
+                now = datetime.now(TIMEZONE)
+                if should_auto_load(self.last_attempt_date, now):
+                    self.last_attempt_date = now.date()   # Ditandai dulu agar gagal total tidak loop terus
+                    self._load()
+            except Exception as e:
+                self._set_error(e, exc_info=True)
+            time.sleep(AUTO_LOAD_POLL_SECONDS)
+
+    def _load(self):
+        # Hitung tanggal kemarin (H-1) dan interval production day-nya
+        yesterday, _ = get_yesterday_production_dates()
+        auto_start_time, auto_filter_end = production_day_window(yesterday)
+        auto_api_start = auto_start_time - timedelta(hours=API_LOOKBACK_HOURS)
+        auto_api_end = auto_filter_end + timedelta(hours=API_LOOKAHEAD_HOURS)
+        
+        # ===== RETRY LOOP MECHANISM =====
+        # Jalur tanpa UI: SID dari session pool (expired -> diganti pool, bukan session_state),
+        # pesan build_trip_dataframe dikumpulkan di sini, bukan st.warning / st.toast
+        for attempt in range(1, AUTO_LOAD_MAX_RETRIES + 1):
+            self._set_status(f"Auto-load attempt {attempt}/{AUTO_LOAD_MAX_RETRIES}...")
+            messages = []
+            try:
+                sid = get_session_pool().control_session()
+                resource_id = get_resource_id(sid)
+                if not resource_id:
+                    raise RuntimeError("Resource Not Found")
+                auto_df = load_trip_range(sid, resource_id, auto_start_time, auto_api_start, auto_api_end, auto_filter_end,
+                                          notify=messages.append)
+                if auto_df is not None and not auto_df.empty and not auto_df.attrs.get("failed_days"):
+                    with self._lock:
+                        self._result = {
+                            "loaded_on": datetime.now(TIMEZONE).date(),
+                            "production_date": yesterday,
+                            "df": auto_df,
+                        }
+                        self.status = f"Loaded {len(auto_df)} rows ({yesterday})"
+                        self.last_error = None
+                    return
+                self._set_error(f"Attempt {attempt}/{AUTO_LOAD_MAX_RETRIES}: {' '.join(messages) or 'No data found.'}")
+            except Exception as e:
+                self._set_error(f"Attempt {attempt}/{AUTO_LOAD_MAX_RETRIES} error: {e}", exc_info=True)
+            if attempt < AUTO_LOAD_MAX_RETRIES:
+                time.sleep(AUTO_LOAD_RETRY_DELAY_SECONDS)
+        self._set_status(f"Auto-load gagal setelah {AUTO_LOAD_MAX_RETRIES} attempts ({yesterday})")
+
+@st.cache_resource
+def get_auto_loader():
+    return AutoLoadScheduler()
+
+# --- FILTER INDEX (Dibangun sekali per dataset, dipakai ulang tiap rerun) ---
+FILTER_INDEX_COLUMNS = ["Shift", "Unit", "Group", "Initial Location", "Final Location"]
+SEARCH_COLUMNS = ["Unit", "Initial Location", "Final Location"]
+SEARCH_NGRAM = 3   # Query lebih pendek dari ini di-scan langsung ke label unik
+# Kolom dengan label unik > rasio ini x jumlah row (mis. koordinat) tidak diberi index trigram, cukup scan label
+SEARCH_NGRAM_MAX_DISTINCT_RATIO = 0.5
+
+class TripFilterIndex:
+    """
+    Kode kategori per kolom filter (pd.factorize) + label lowercase untuk search.
+    Filter dihitung di level kategori (ratusan nilai unik) lalu dipetakan ke row lewat kode,
+    jadi base frame tidak pernah di-copy; hasilnya boolean mask atas df.
+    Kolom search punya inverted index trigram atas label unik dan posisi row per kategori.
+    """
+    def __init__(self, df):
+        self.df = df
+        self._codes = {}
+        self._categories = {}
+        self._lower_categories = {}
+        self._ngrams = {}
+        self._row_positions = {}
+        self._row_starts = {}
+        self.version = dataset_version(df)
+        for column in FILTER_INDEX_COLUMNS:
+            codes, categories = pd.factorize(df[column])
+            self._codes[column] = codes
+            self._categories[column] = pd.Index(categories)
+
+    def _ensure_search_index(self, column):
+        """Bangun index search kolom ini saat pertama kali dipakai (kiosk tanpa search tidak bayar apa-apa)."""
+        if column in self._ngrams:
+            return
+        self._lower_categories[column] = self._categories[column].astype(str).str.lower()
+        
+        # Trigram -> set kode kategori yang labelnya mengandung trigram itu
+        ngrams = None
+        if len(self._categories[column]) <= SEARCH_NGRAM_MAX_DISTINCT_RATIO * len(self.df):
+            ngrams = {}
+            for code, label in enumerate(self._lower_categories[column]):
+                for i in range(len(label) - SEARCH_NGRAM + 1):
+                    ngrams.setdefault(label[i:i + SEARCH_NGRAM], set()).add(code)
+        
+        # Posisi row dikelompokkan per kode: row kategori k = positions[starts[k]:starts[k + 1]]
+        codes = self._codes[column]
+        self._row_positions[column] = np.argsort(codes, kind="stable")
+        self._row_starts[column] = np.searchsorted(
+            codes[self._row_positions[column]], np.arange(len(self._categories[column]) + 1)
+        )
+        self._ngrams[column] = ngrams
+
+    def options(self, column):
+        """Nilai unik kolom (urutan kemunculan, sama seperti Series.unique())."""
+        return self._categories[column].tolist()
+
+    def isin_mask(self, column, values):
+        wanted = self._categories[column].get_indexer(values)
+        return np.isin(self._codes[column], wanted[wanted >= 0])
+
+    def _ngram_candidates(self, column, term):
+        """Kode kategori yang memuat semua trigram term (kandidat, belum diverifikasi)."""
+        candidates = None
+        for i in range(len(term) - SEARCH_NGRAM + 1):
+            codes = self._ngrams[column].get(term[i:i + SEARCH_NGRAM])
+            if not codes:
+                return set()
+            candidates = set(codes) if candidates is None else candidates & codes
+        return candidates
+
+    def _matching_categories(self, column, term):
+        """Kode kategori yang labelnya cocok dengan term (case-insensitive)."""
+        literal = not set(term) & set(".^$*+?{}[]\\|()")
+        if not literal:
+            try:
+                re.compile(term)
+            except re.error:
+                literal = True   # Regex tidak valid: perlakukan sebagai teks biasa
+        lower_term = term.lower()
+        if literal and len(lower_term) >= SEARCH_NGRAM and self._ngrams[column] is not None:
+            labels = self._lower_categories[column]
+            return [code for code in self._ngram_candidates(column, lower_term) if lower_term in labels[code]]
+        if literal:
+            # Query pendek / kolom tanpa trigram: scan label unik
+            matched = self._lower_categories[column].str.contains(lower_term, regex=False)
+        else:
+            matched = self._categories[column].astype(str).str.contains(term, case=False)
+        return np.flatnonzero(matched)
+
+    def search_mask(self, term):
+        """Sama dengan str.contains(term, case=False, na=False) di Unit / Initial / Final Location."""
+        mask = np.zeros(len(self.df), dtype=bool)
+        for column in SEARCH_COLUMNS:
+            self._ensure_search_index(column)
+            positions, starts = self._row_positions[column], self._row_starts[column]
+            for code in self._matching_categories(column, term):
+                mask[positions[starts[code]:starts[code + 1]]] = True
+        return mask
+
+    def filter(self, shifts=None, units=None, locations=None, search_term=""):
+        """Kembalikan DataFrame hasil filter; tanpa filter aktif, base frame dikembalikan apa adanya."""
+        mask = None
+        for column, values in (("Shift", shifts), ("Unit", units), ("Initial Location", locations)):
+            if values:
+                column_mask = self.isin_mask(column, values)
+                mask = column_mask if mask is None else mask & column_mask
+        if search_term:
+            term_mask = self.search_mask(search_term)
+            mask = term_mask if mask is None else mask & term_mask
+        if mask is None:
+            return self.df
+        return self.df[mask]
+
+def get_filter_index(df):
+    """Index filter untuk dataset aktif session ini; dibangun ulang hanya jika dataset berganti."""
+    filter_index = st.session_state.get('filter_index')
+    if filter_index is None or filter_index.df is not df:
+        filter_index = TripFilterIndex(df)
+        st.session_state['filter_index'] = filter_index
+    return filter_index
+
+# --- CHART AGGREGATES (Cache LRU per dataset + filter, dipakai bersama semua session) ---
+def dataset_version(df):
+    """Fingerprint isi dataset: sama untuk semua session yang me-load data yang sama."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+def filter_state_key(shifts, units, locations, search_term):
+    """Normalisasi state filter (urutan pilihan multiselect tidak berpengaruh)."""
+    return (tuple(sorted(shifts or [])), tuple(sorted(units or [])), tuple(sorted(locations or [])), search_term or "")
+
+def compute_dashboard_aggregates(filtered_df):
+    """Semua angka KPI + data chart dari data terfilter. Hasilnya kecil (top 10 / per jam), aman di-cache."""
+    total_trips = len(filtered_df)
+    # MODIFIKASI: Menggunakan kolom Jam
+    total_idle_hours = filtered_df["Idling (Jam)"].sum()
+    kpi = {
+        "total_trips": total_trips,
+        "total_units": filtered_df["Unit"].nunique(),
+        "total_idle_hours": total_idle_hours,
+        "total_mileage": filtered_df["Mileage (km)"].sum(),
+        # MODIFIKASI: Rata-rata dalam jam
+        "avg_idle_per_trip": total_idle_hours / total_trips if total_trips > 0 else 0,
+    }
+    
+    # --- CATEGORIZATION LOGIC (Robust) ---
+    # 1. BUS (Priority: Very Specific)
+    bus_mask = filtered_df["Unit"].str.contains("BUS", case=False, na=False)
+    
+    # 2. LV (Priority: Specific)
+    lv_mask = (
+        filtered_df["Unit"].str.contains("LV", case=False, na=False) |
+        filtered_df["Group"].str.contains("LIGHT VEHICLE", case=False, na=False)
+    ) & ~bus_mask
+    
+    # 3. GHT & GMT Category (Trucks including JETTY)
+    # MODIFIKASI: Mengeluarkan unit SMP, GPE, dan KAI agar fokus ke MGE saja
+    ght_mask = (
+        (filtered_df["Unit"].str.contains("GHT|GMT|DT-|JETTY|TR-|HAULER", case=False, na=False) |
+         filtered_df["Group"].str.contains("HAULING|MINING|JETTY|GHT|GMT|JO MGE|PRODUKSI", case=False, na=False))
+        & ~filtered_df["Unit"].str.contains("SMP|GPE|KAI", case=False, na=False)
+    ) & ~bus_mask & ~lv_mask
+    
+    def top10_idle(category_mask):
+        idle_stats = filtered_df[category_mask].groupby("Unit", observed=True)["Idling (Jam)"].sum().sort_values(ascending=False).head(10).reset_index()
+        idle_stats.columns = ['Unit', 'Hours']
+        return idle_stats
+    
+    # Chart 4: Produktivitas - Stacked Bar (Motion vs Idle)
+    prod_data = filtered_df.groupby("Unit", observed=True).agg({
+        "Motion (Jam)": "sum",
+        "Idling (Jam)": "sum"
+    }).reset_index()
+    
+    prod_data["Total"] = prod_data["Motion (Jam)"] + prod_data["Idling (Jam)"]
+    prod_data = prod_data.sort_values("Idling (Jam)", ascending=False).head(10)
+    
+    chart_data_sorted = None
+    if len(prod_data) > 0:
+        chart_data = prod_data.melt(
+            id_vars=['Unit', 'Total'],
+            value_vars=['Motion (Jam)', 'Idling (Jam)'],
+            var_name='Activity',
+            value_name='Hours'
+        )
+        
+        chart_data['Activity'] = chart_data['Activity'].replace({
+            'Motion (Jam)': 'Motion',
+            'Idling (Jam)': 'Idle'
+        })
+        
+        chart_data['Activity'] = pd.Categorical(chart_data['Activity'], categories=['Idle', 'Motion'], ordered=True)
+        
+        # Hitung posisi mid-point untuk label
+        chart_data_sorted = chart_data.sort_values(['Unit', 'Activity']).copy()
+        chart_data_sorted['cumsum'] = chart_data_sorted.groupby('Unit')['Hours'].cumsum()
+        chart_data_sorted['y_mid'] = chart_data_sorted['cumsum'] - (chart_data_sorted['Hours'] / 2)
+    
+    # Chart 5: Peak Hours
+    start_hour = beginning_hour(filtered_df)
+    hourly_activity = filtered_df.groupby(start_hour.rename("Start_Hour")).size().reset_index(name='Trip_Count')
+    
+    return {
+        "kpi": kpi,
+        "ght_idle_stats": top10_idle(ght_mask),
+        "bus_idle_stats": top10_idle(bus_mask),
+        "lv_idle_stats": top10_idle(lv_mask),
+        "unit_order": prod_data['Unit'].tolist(),
+        "prod_chart_data": chart_data_sorted,
+        "hourly_activity": hourly_activity,
+    }
+
+class AggregateCache:
+    """
+    Cache LRU agregat dashboard, key: (dataset_version, filter_state_key).
+    Kiosk yang refresh dengan data + filter sama tidak menghitung ulang groupby apapun.
+    max_bytes: batas total len(value) (untuk cache export bytes); value yang sendirian
+    sudah melebihi batas tidak di-cache sama sekali.
+    """
+    def __init__(self, max_entries, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _size(self, value):
+        return len(value) if self.max_bytes is not None else 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = compute()
+        size = self._size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._size(self._entries[key])
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._total_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= self._size(evicted)
+        return value
+
+@st.cache_resource
+def get_aggregate_cache():
+    return AggregateCache(AGGREGATE_CACHE_MAX_ENTRIES)
+
+# --- EXPORT (Dibuat saat tombol download diklik, bukan tiap rerun) ---
+EXPORT_COLUMNS = [
+    "Date", "Shift", "Group", "Unit",
+    "Beginning", "Initial Location", "Final Location",
+    "In Motion", "Mileage", "Idling"
+]
+EXPORT_FORMATS = {
+    "xlsx": {"label": "Excel", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "csv": {"label": "CSV", "mime": "text/csv"},
+    "parquet": {"label": "Parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+EXPORT_CHUNK_ROWS = 10000
+
+def export_frame(filtered_df, first_no=1):
+    """Kolom export + nomor urut (mulai dari first_no); Beginning dibentuk ulang dari frame compact."""
+    export_df = filtered_df.assign(Beginning=beginning_text(filtered_df))[EXPORT_COLUMNS]
+    export_df.insert(0, "No", range(first_no, first_no + len(export_df)))
+    return export_df
+
+def write_xlsx_export(export_df):
+    """
+    Tulis xlsx row per row dengan xlsxwriter constant_memory: hanya satu row di memory,
+    jadi range sebulan tidak OOM (pd.ExcelWriter menulis per kolom, tidak cocok untuk mode ini).
+    """
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Idle Data")
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+    worksheet.write_row(0, 0, export_df.columns.tolist(), header_format)
+    # Konversi per chunk agar copy object-nya juga kecil; NaN ditulis sebagai cell kosong
+    for chunk_start in range(0, len(export_df), EXPORT_CHUNK_ROWS):
+        chunk = export_df.iloc[chunk_start:chunk_start + EXPORT_CHUNK_ROWS]
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row_index, row in enumerate(values.itertuples(index=False, name=None), start=chunk_start + 1):
+            worksheet.write_row(row_index, 0, row)
+    workbook.close()
+    return output.getvalue()
+
+def build_export(filtered_df, export_format):
+    """Bytes file export untuk format xlsx / csv / parquet."""
+    export_df = export_frame(filtered_df)
+    if export_format == "xlsx":
+        return write_xlsx_export(export_df)
+    if export_format == "csv":
+        return export_df.to_csv(index=False).encode("utf-8-sig")  # BOM agar Excel baca UTF-8
+    output = io.BytesIO()
+    export_df.to_parquet(output, index=False)
+    return output.getvalue()
+
+@st.cache_resource
+def get_export_cache():
+    return AggregateCache(EXPORT_CACHE_MAX_ENTRIES, EXPORT_CACHE_MAX_BYTES)
+
+# --- DETAIL TABLE (Pagination server-side, hanya page aktif yang dikirim ke browser) ---
+TABLE_PAGE_SIZES = [50, 100, 250, 500]
+TABLE_DEFAULT_PAGE_SIZE = 100
+TABLE_ORDER_CACHE_MAX_ENTRIES = 8   # Urutan sort (array posisi) per dataset + filter + sort
+# Kolom tampilan -> kolom frame compact yang dipakai untuk sort (durasi/jarak sort numerik, bukan string)
+TABLE_SORT_COLUMNS = {
+    "Beginning": "Beginning_TS",
+    "Date": "Date",
+    "Shift": "Shift",
+    "Group": "Group",
+    "Unit": "Unit",
+    "Initial Location": "Initial Location",
+    "Final Location": "Final Location",
+    "In Motion": "Motion (Jam)",
+    "Mileage": "Mileage (km)",
+    "Idling": "Idling (Jam)",
+}
+
+def table_sort_order(filtered_df, sort_column, ascending):
+    """
+    Posisi row terurut (stable, row seri tetap urutan asli) menurut kolom tampilan; None = urutan asli frame.
+    Nilai kosong (NaN / kategori code -1) selalu di akhir, baik ascending maupun descending.
+    """
+    if sort_column is None:
+        return None
+    column = filtered_df[TABLE_SORT_COLUMNS[sort_column]]
+    # Kategori dibuat dari astype("category") -> categories sudah terurut, cukup sort code-nya
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        keys = column.cat.codes.to_numpy()
+        missing = keys == -1
+    else:
+        keys = column.to_numpy()
+        missing = column.isna().to_numpy()
+    present = np.flatnonzero(~missing)
+    keys = keys[present]
+    if ascending:
+        order = np.argsort(keys, kind="stable")
+    else:
+        order = len(keys) - 1 - np.argsort(keys[::-1], kind="stable")[::-1]
+    return np.concatenate([present[order], np.flatnonzero(missing)])
+
+def table_page(filtered_df, page, page_size, order=None):
+    """Slice satu page (1-based) dari data terfilter dalam format tampilan; nomor urut ikut posisi global."""
+    start = (page - 1) * page_size
+    positions = slice(start, start + page_size) if order is None else order[start:start + page_size]
+    return export_frame(filtered_df.iloc[positions], first_no=start + 1)
+
+@st.cache_resource
+def get_table_order_cache():
+    return AggregateCache(TABLE_ORDER_CACHE_MAX_ENTRIES)
+
+# --- CHART FACTORY (Spec Vega-Lite per tabel agregat + jenis chart, di-cache lintas rerun & session) ---
+CHART_SPEC_CACHE_MAX_ENTRIES = 64
+TOP10_CHART_STYLES = {
+    "top10_ght": {"title": "1. Top 10 GHT & GMT", "color": "#f97316", "text_color": "#f97316", "label_font_size": 10},
+    "top10_bus": {"title": "2. Top 10 BUS", "color": "#6366f1", "text_color": "#4f46e5", "label_font_size": 9},
+    "top10_lv": {"title": "3. Top 10 Light Vehicle (LV)", "color": "#38CE3C", "text_color": "#38CE3C", "label_font_size": 10},
+}
+
+def chart_title(text):
+    return alt.TitleParams(text=text, anchor='start', fontSize=15, fontWeight=700, color='#1e293b', offset=10)
+
+def build_top10_chart(idle_stats, style):
+    """Bar horizontal Top 10 idle per unit (kolom Unit, Hours)."""
+    max_val = idle_stats['Hours'].max()
+    bars = alt.Chart(idle_stats).mark_bar(color=style["color"], cornerRadiusEnd=6).encode(
+        x=alt.X('Hours:Q', title=None, scale=alt.Scale(domain=[0, max_val * 1.15]), axis=alt.Axis(grid=False, labels=False, ticks=False, domain=False)),
+        y=alt.Y('Unit:N', sort='-x', title=None, axis=alt.Axis(labelLimit=180, labelFontSize=style["label_font_size"], labelColor='#555555', labelFontWeight=500, tickSize=0, domain=False)),
+        tooltip=[alt.Tooltip('Unit', title='Unit'), alt.Tooltip('Hours', title='Idle (Jam)', format='.1f')]
+    )
+    text = bars.mark_text(align='left', dx=5, color=style["text_color"], fontSize=11, fontWeight='bold').encode(text=alt.Text('Hours:Q', format='.1f'))
+    return (bars + text).properties(
+        height=280, padding={'left': 10, 'right': 25, 'top': 10, 'bottom': 10},
+        title=chart_title(style["title"])
+    ).configure(background='transparent').configure_view(stroke=None)
+
+def build_productivity_chart(chart_data, unit_order):
+    """Stacked bar Motion vs Idle per unit (kolom Unit, Activity, Hours, y_mid)."""
+    bars = alt.Chart(chart_data).mark_bar(
+        cornerRadiusTopLeft=4,
+        cornerRadiusTopRight=4
+    ).encode(
+        x=alt.X('Unit:N',
+            sort=unit_order,
+            title=None,
+            axis=alt.Axis(
+                labelAngle=-45,
+                labelFontSize=9,
+                labelColor='#64748b',
+                labelFontWeight=500
+            )
+        ),
+        y=alt.Y('Hours:Q',
+            title='Jam',
+            stack='zero',
+            axis=alt.Axis(
+                grid=True,
+                gridColor='#f1f5f9',
+                gridDash=[2, 4],
+                titleFontSize=10,
+                titleColor='#64748b'
+            )
+        ),
+        color=alt.Color('Activity:N',
+            scale=alt.Scale(domain=['Idle', 'Motion'], range=['#FF4D6B', '#38CE3C']),
+            legend=alt.Legend(
+                orient='top-right',
+                direction='horizontal',
+                title=None,
+                labelFontSize=10,
+                labelColor='#64748b',
+                symbolSize=60,
+                offset=0
+            )
+        ),
+        order=alt.Order('Activity:N', sort='ascending'),
+        tooltip=[
+            alt.Tooltip('Unit', title='Unit'),
+            alt.Tooltip('Activity', title='Aktivitas'),
+            alt.Tooltip('Hours:Q', title='Jam', format='.1f')
+        ]
+    )
+
+    # Text label di tengah setiap segment (hanya jika cukup besar)
+    text = alt.Chart(chart_data[chart_data['Hours'] > 0.5]).mark_text(
+        align='center',
+        baseline='middle',
+        fontSize=10,  # REVISI: 10px
+        fontWeight=600,
+        color='white'
+    ).encode(
+        x=alt.X('Unit:N', sort=unit_order),
+        y=alt.Y('y_mid:Q'),
+        text=alt.Text('Hours:Q', format='.1f')
+    )
+
+    return (bars + text).properties(
+        height=280,
+        padding={'left': 20, 'right': 35, 'top': 10, 'bottom': 10},
+        title=chart_title('4. Produktivitas: Rasio Jalan vs Diam')
+    ).configure(
+        background='transparent'
+    ).configure_view(stroke=None)
+
+def build_peak_hours_chart(hourly_activity):
+    """Bar vertikal jumlah trip per jam mulai (kolom Start_Hour, Trip_Count)."""
+    # Bar chart - YELLOW untuk Peak Hours
+    bars = alt.Chart(hourly_activity).mark_bar(
+        color='#FACC15',
+        cornerRadiusTopLeft=4,
+        cornerRadiusTopRight=4
+    ).encode(
+        x=alt.X('Start_Hour:O',
+            title='Jam',
+            axis=alt.Axis(
+                labelAngle=0,
+                labelFontSize=9,
+                labelColor='#64748b',
+                labelFontWeight=500,
+                titleFontSize=10,
+                titleColor='#64748b'
+            )
+        ),
+        y=alt.Y('Trip_Count:Q',
+            title='Trip',
+            axis=alt.Axis(
+                grid=True,
+                gridColor='#f1f5f9',
+                gridDash=[2, 4],
+                titleFontSize=10,
+                titleColor='#64748b'
+            )
+        ),
+        tooltip=[
+            alt.Tooltip('Start_Hour', title='Jam'),
+            alt.Tooltip('Trip_Count', title='Total Trip')
+        ]
+    )
+
+    # Text labels - Orange gelap agar terbaca
+    text = bars.mark_text(
+        align='center',
+        baseline='bottom',
+        dy=-4,
+        color='#d97706',
+        fontSize=10,  # REVISI: 10px
+        fontWeight=600
+    ).encode(
+        text=alt.Text('Trip_Count:Q')
+    )
+
+    return (bars + text).properties(
+        height=280,
+        padding={'left': 20, 'right': 35, 'top': 10, 'bottom': 10},
+        title=chart_title('5. Peak Hours')
+    ).configure(
+        background='transparent'
+    ).configure_view(stroke=None)
+
+def build_chart(kind, data, **options):
+    """Altair chart untuk satu jenis chart dashboard dari tabel agregat kecil."""
+    if kind in TOP10_CHART_STYLES:
+        return build_top10_chart(data, TOP10_CHART_STYLES[kind])
+    if kind == "productivity":
+        return build_productivity_chart(data, options["unit_order"])
+    if kind == "peak_hours":
+        return build_peak_hours_chart(data)
+    raise ValueError(f"Unknown chart kind: {kind}")
+
+@st.cache_resource
+def get_chart_spec_cache():
+    return AggregateCache(CHART_SPEC_CACHE_MAX_ENTRIES)
+
+def chart_spec(kind, data, **options):
+    """
+    Spec Vega-Lite (dict, data ter-embed) untuk chart dashboard, di-cache per (isi data, jenis, theme, opsi).
+    Rerun / session lain dengan agregat yang sama tidak membangun + validasi ulang chart Altair.
+    Spec di-share: jangan di-mutate (st.vega_lite_chart hanya mengubah salinannya).
+    """
+    key = (dataset_version(data), kind, CHART_THEME, repr(sorted(options.items())))
+    return get_chart_spec_cache().get_or_compute(key, lambda: build_chart(kind, data, **options).to_dict())
+
 # --- STREAMLIT UI ---
 st.set_page_config(page_title="Mining Idle Time Dashboard", page_icon="⚙️", layout="wide")
 
@@ -575,85 +2435,52 @@ REFRESH_INTERVAL_MS = 5 * 60 * 1000
 refresh_count = st_autorefresh(interval=REFRESH_INTERVAL_MS, limit=None, key="kiosk_refresh")
 
 now_time = datetime.now(TIMEZONE)
+auto_loader = get_auto_loader()
+scheduler_error_html = (
+    f"<span style='color:#ffd5dc'>⚠️ {html.escape(auto_loader.last_error)}</span><br>" if auto_loader.last_error else ""
+)
 st.sidebar.markdown(f"""
 <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
             padding: 0.8rem; border-radius: 8px; margin-bottom: 1rem; color: white; font-size: 0.75rem;'>
     <b>⏰ Auto-Load Scheduler</b><br>
-    Status: <b>Monitoring Aktif</b><br>
+    Status: <b>{auto_loader.status}</b><br>
+    {scheduler_error_html}
     Waktu Sistem: {now_time.strftime('%H:%M:%S')}<br>
     <span style='opacity:0.7'>🔄 Cek otomatis setiap 5 menit</span><br>
     <span style='opacity:0.7'>🚀 Eksekusi otomatis setelah 06:00 pagi</span>
 </div>
 """, unsafe_allow_html=True)
 
-# --- AUTO-LOAD EXECUTION ---
-if should_auto_load():
-    st.toast("🌅 Good Morning! Auto-loading production data for yesterday...")
-    
-    # Hitung tanggal kemarin (H-1)
-    yesterday_start, yesterday_end = get_yesterday_production_dates()
-    
-    # Hitung interval waktu untuk H-1
-    auto_start_dt = datetime.combine(yesterday_start, datetime.min.time())
-    auto_start_dt = TIMEZONE.localize(auto_start_dt)
-    auto_start_time = auto_start_dt.replace(hour=6, minute=0, second=0, microsecond=0)
-    
-    auto_end_dt = datetime.combine(yesterday_end, datetime.min.time())
-    auto_end_dt = TIMEZONE.localize(auto_end_dt)
-    auto_filter_end = (auto_end_dt + timedelta(days=1)).replace(hour=6, minute=0, second=0, microsecond=0)
-    auto_api_end = auto_filter_end + timedelta(hours=6)
-    auto_api_start = auto_start_time - timedelta(hours=1)
-    
-    # ===== RETRY LOOP MECHANISM =====
-    MAX_RETRIES = 3
-    RETRY_DELAY_SECONDS = 10
-    auto_load_success = False
-    auto_df = None
-    
-    status_placeholder = st.empty()
-    
-    for attempt in range(1, MAX_RETRIES + 1):
-        status_placeholder.info(f"⏳ Auto-load attempt {attempt}/{MAX_RETRIES}...")
-        
-        try:
-            auto_df = fetch_and_process_data(auto_start_time, auto_api_start, auto_api_end, auto_filter_end, is_auto_load=True)
-            
-            if auto_df is not None and not auto_df.empty:
-                # SUCCESS!
-                st.session_state['data_df'] = auto_df
-                st.session_state['last_auto_load_date'] = datetime.now(TIMEZONE).strftime("%Y-%m-%d")
-                auto_load_success = True
-                
-                status_placeholder.success(f"✅ Auto-loaded {len(auto_df)} rows for {yesterday_start} (Attempt {attempt}/{MAX_RETRIES})")
-                st.toast(f"✅ Auto-loaded {len(auto_df)} rows successfully!")
-                
-                time.sleep(1)  # Jeda sebentar agar user sempat lihat pesan sukses
-                break          # Keluar loop dulu
-            else:
-                # GAGAL (Data Kosong)
-                if attempt < MAX_RETRIES:
-                    status_placeholder.warning(f"⚠️ Attempt {attempt}/{MAX_RETRIES} returned no data. Retrying in {RETRY_DELAY_SECONDS}s...")
-                    st.toast(f"⏳ Attempt {attempt}/{MAX_RETRIES} failed... Retrying...")
-                    time.sleep(RETRY_DELAY_SECONDS)
-                else:
-                    status_placeholder.error(f"❌ All {MAX_RETRIES} attempts failed. No data available for {yesterday_start}.")
-                    st.toast(f"❌ Auto-load failed after {MAX_RETRIES} attempts")
-                    
-        except Exception as e:
-            # ERROR CRASH
-            if attempt < MAX_RETRIES:
-                status_placeholder.warning(f"⚠️ Attempt {attempt}/{MAX_RETRIES} error: {str(e)[:50]}... Retrying in {RETRY_DELAY_SECONDS}s")
-                time.sleep(RETRY_DELAY_SECONDS)
-            else:
-                status_placeholder.error(f"❌ All {MAX_RETRIES} attempts failed. Error: {str(e)[:100]}")
-    
-    # KUNCI PERBAIKAN: Rerun dilakukan DI LUAR loop jika sukses
-    if auto_load_success:
-        st.rerun()
-
-    # Mark as attempted untuk mencegah infinite loop jika gagal total
-    if not auto_load_success:
-        st.session_state['last_auto_load_date'] = datetime.now(TIMEZONE).strftime("%Y-%m-%d")
+api_stats = get_rate_limiter().snapshot()
+st.sidebar.caption(
+    f"📡 Wialon API: {api_stats['rate']:.1f} call/s · antrian {api_stats['queue_depth']} · "
+    f"throttled {api_stats['throttled']} · latency {api_stats['latency']:.2f}s"
+)
+
+live_mode = st.sidebar.toggle("🔴 Live Mode (hari ini)", key="live_mode",
+                              help="Tampilkan production day berjalan, update increment tiap refresh")
+
+# --- AUTO-LOAD PICK-UP ---
+# Fetch + retry dikerjakan AutoLoadScheduler di background; session cukup ambil hasil terbaru
+auto_result = auto_loader.latest()
+if not live_mode and auto_result and st.session_state.get('last_auto_load_date') != auto_result["loaded_on"]:
+    st.session_state['data_df'] = auto_result["df"]
+    st.session_state['last_auto_load_date'] = auto_result["loaded_on"]
+    st.toast(f"🌅 Good Morning! Auto-loaded {len(auto_result['df'])} rows for {auto_result['production_date']}")
+
+# --- LIVE MODE EXECUTION ---
+# Snapshot di-share semua session: fetch increment hanya jika snapshot bersama sudah lewat LIVE_REFRESH_SECONDS
+if live_mode:
+    with st.spinner('Live update...'):
+        live_snapshot = get_live_snapshot()
+    
+    if live_snapshot and live_snapshot["df"] is not None:
+        st.session_state['data_df'] = live_snapshot["df"]
+    if live_snapshot and live_snapshot["state"]:
+        st.sidebar.caption(
+            f"🔴 Live {live_snapshot['state']['day']} · data s/d "
+            f"{live_snapshot['state']['fetched_until'].strftime('%H:%M:%S')}"
+        )
 
 # Custom CSS - Responsive v2.0 (Mobile Friendly)
 st.markdown("""
@@ -1285,28 +3112,28 @@ with cols[1]:
 # Start Time: Tanggal 'DARI' jam 06:00 WITA
 start_datetime = datetime.combine(start_date, datetime.min.time())
 start_datetime = TIMEZONE.localize(start_datetime)
-start_time = start_datetime.replace(hour=6, minute=0, second=0, microsecond=0)
+start_time = start_datetime.replace(hour=PRODUCTION_DAY_START_HOUR, minute=0, second=0, microsecond=0)
 
 # End Time Calculation
 end_datetime = datetime.combine(end_date, datetime.min.time())
 end_datetime = TIMEZONE.localize(end_datetime)
 
 # filter_end_time: Batas SUCI untuk laporan (Jam 06:00 besoknya)
-filter_end_time = (end_datetime + timedelta(days=1)).replace(hour=6, minute=0, second=0, microsecond=0)
+filter_end_time = (end_datetime + timedelta(days=1)).replace(hour=PRODUCTION_DAY_START_HOUR, minute=0, second=0, microsecond=0)
 
 # api_start_time: Batas REQUEST ke Wialon (Ditarik mundur 1 jam buat catch crossover trips)
-api_start_time = start_time - timedelta(hours=1)
+api_start_time = start_time - timedelta(hours=API_LOOKBACK_HOURS)
 
 # api_end_time: Batas REQUEST ke Wialon (Dilebihkan 6 jam buat jaga-jaga)
 # Agar data trip jam 05:59 pagi besoknya PASTI ke-download
-api_end_time = filter_end_time + timedelta(hours=6)
+api_end_time = filter_end_time + timedelta(hours=API_LOOKAHEAD_HOURS)
 
 # Debugging (Tampilkan di terminal)
 print(f"DEBUG TIME: API Request from {start_time} to {api_end_time}")
 print(f"DEBUG TIME: Filter Range from {start_time} to {filter_end_time}")
 
 with cols[2]:
-    run_btn = st.button("🚀 Load", type="primary", use_container_width=True)
+    run_btn = st.button("🚀 Load", type="primary", use_container_width=True, disabled=live_mode)
 
 # Placeholder filters
 shift_filter = []
@@ -1316,18 +3143,24 @@ search_term = ""
 
 if 'data_df' in st.session_state:
     df = st.session_state['data_df']
-    
+    filter_index = get_filter_index(df)
+    memory_report = trip_frame_memory_report(df)
+    st.sidebar.caption(
+        f"🧠 Data: {memory_report['rows']:,} trip · {memory_report['total_bytes'] / 1e6:.1f} MB · "
+        f"{memory_report['bytes_per_trip']:.0f} B/trip (target {memory_report['target_bytes_per_trip']})"
+    )
+
     with cols[3]:
-        all_shifts = df["Shift"].unique().tolist()
-        default_shifts = [s for s in all_shifts if s in ["Day", "Night"]]
+        all_shifts = filter_index.options("Shift")
+        default_shifts = [s for s in all_shifts if s in [name for name, _ in SHIFT_DEFINITIONS]]
         shift_filter = st.multiselect("SHIFT", options=all_shifts, default=default_shifts)
     
     with cols[4]:
-        unit_options = sorted(df["Unit"].unique())
+        unit_options = sorted(filter_index.options("Unit"))
         unit_filter = st.multiselect("UNIT", options=unit_options)
         
     with cols[5]:
-        all_locations = [loc for loc in df["Initial Location"].unique() if loc and len(str(loc)) > 0]
+        all_locations = [loc for loc in filter_index.options("Initial Location") if loc and len(str(loc)) > 0]
         named_locs = sorted([loc for loc in all_locations if loc and not str(loc).lstrip('-').replace('.', '').replace(',', '').replace(' ', '').isdigit() and not str(loc)[0].lstrip('-').isdigit()])
         coord_locs = sorted([loc for loc in all_locations if loc not in named_locs])
         loc_options = named_locs + coord_locs
@@ -1336,53 +3169,15 @@ if 'data_df' in st.session_state:
     with cols[6]:
         search_term = st.text_input("🔍 CARI", placeholder="Ketik unit/lokasi...")
 
-# --- MAIN LOGIC (Manual Load Button) ---
-if run_btn:
-    st.cache_data.clear()
-    
-    with st.spinner('Loading Data (Optimized)...'):
-        df = fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_time, is_auto_load=False)
-        
-        if df is not None and not df.empty:
-            st.session_state['data_df'] = df
-            st.toast(f"✅ Loaded {len(df)} rows successfully!")
-            st.rerun()
-
-# --- DISPLAY DATA ---
-if 'data_df' in st.session_state:
-    df = st.session_state['data_df']
-    
-    # Apply Filters
-    filtered_df = df.copy()
-    
-    if shift_filter:
-        filtered_df = filtered_df[filtered_df["Shift"].isin(shift_filter)]
-        
-    if unit_filter:
-        filtered_df = filtered_df[filtered_df["Unit"].isin(unit_filter)]
-        
-    if loc_filter:
-        filtered_df = filtered_df[filtered_df["Initial Location"].isin(loc_filter)]
-        
-    if search_term:
-        mask = (
-            filtered_df["Unit"].str.contains(search_term, case=False, na=False) |
-            filtered_df["Initial Location"].str.contains(search_term, case=False, na=False) |
-            filtered_df["Final Location"].str.contains(search_term, case=False, na=False)
-        )
-        filtered_df = filtered_df[mask]
-
-    # --- KPI CARDS ---
-    total_trips = len(filtered_df)
-    total_units = filtered_df["Unit"].nunique()
-    # MODIFIKASI: Menggunakan kolom Jam
-    total_idle_hours = filtered_df["Idling (Jam)"].sum()
-    total_mileage = filtered_df["Mileage (km)"].sum()
-    # MODIFIKASI: Rata-rata dalam jam
-    avg_idle_per_trip = total_idle_hours / total_trips if total_trips > 0 else 0
-    
-    # --- SPACER: FILTER TO KPI (Separation of Concerns) ---
-    st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
+# --- RENDER HELPERS (KPI & Top 10, dipakai tampilan utama dan preview progresif) ---
+def render_kpi_cards(aggregates):
+    """Render 5 KPI card dari compute_dashboard_aggregates (juga dipakai untuk preview selama Load)."""
+    kpi = aggregates["kpi"]
+    total_trips = kpi["total_trips"]
+    total_units = kpi["total_units"]
+    total_idle_hours = kpi["total_idle_hours"]
+    total_mileage = kpi["total_mileage"]
+    avg_idle_per_trip = kpi["avg_idle_per_trip"]
 
     # --- KPI CARDS (NEW DESIGN) ---
     kpi_cols = st.columns(5)
@@ -1447,101 +3242,69 @@ if 'data_df' in st.session_state:
         </div>
         """, unsafe_allow_html=True)
 
-    # --- SPACER: KPI TO CHARTS ---
-    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+def render_top10_charts(aggregates):
+    """Render baris 3 chart Top 10 idle (GHT & GMT, BUS, LV)."""
+    # --- ROW 1: 3 CHARTS ---
+    top10_charts = [
+        ("top10_ght", aggregates["ght_idle_stats"], "No GHT & GMT data found for selected period"),
+        ("top10_bus", aggregates["bus_idle_stats"], "No BUS data found for selected period"),
+        ("top10_lv", aggregates["lv_idle_stats"], "No LV data found for selected period"),
+    ]
+    for chart_col, (kind, idle_stats, empty_message) in zip(st.columns(3, gap="medium"), top10_charts):
+        with chart_col:
+            if len(idle_stats) > 0:
+                st.vega_lite_chart(spec=chart_spec(kind, idle_stats), use_container_width=True, theme=None)
+            else:
+                st.info(empty_message)
 
-    # --- CATEGORIZATION LOGIC (Robust) ---
-    # 1. BUS (Priority: Very Specific)
-    bus_mask = filtered_df["Unit"].str.contains("BUS", case=False, na=False)
+
+# --- MAIN LOGIC (Manual Load Button) ---
+if run_btn:
+    load_progress = st.progress(0.0, text="⏳ Menyiapkan data...")
+    preview = st.empty()
+
+    def show_partial(done, total, partial_df):
+        # Preview progresif: KPI & Top 10 dari grup yang sudah selesai
+        load_progress.progress(done / total if total else 1.0,
+                               text=f"⏳ {done}/{total} report selesai · {total - done} tersisa")
+        if partial_df is not None and not partial_df.empty:
+            partial_aggregates = compute_dashboard_aggregates(partial_df)
+            with preview.container():
+                render_kpi_cards(partial_aggregates)
+                render_top10_charts(partial_aggregates)
+
+    with st.spinner('Loading Data (Optimized)...'):
+        df = fetch_and_process_data(start_time, api_start_time, api_end_time, filter_end_time,
+                                    is_auto_load=False, progress_callback=show_partial)
+        
+        if df is not None and not df.empty:
+            st.session_state['data_df'] = df
+            st.toast(f"✅ Loaded {len(df)} rows successfully!")
+            st.rerun()
+
+# --- DISPLAY DATA ---
+if 'data_df' in st.session_state:
+    df = st.session_state['data_df']
     
-    # 2. LV (Priority: Specific)
-    lv_mask = (
-        filtered_df["Unit"].str.contains("LV", case=False, na=False) |
-        filtered_df["Group"].str.contains("LIGHT VEHICLE", case=False, na=False)
-    ) & ~bus_mask
+    # Apply Filters (read-only: filtered_df bisa berupa base frame itu sendiri, jangan di-mutate)
+    filter_index = get_filter_index(df)
+    filtered_df = filter_index.filter(shift_filter, unit_filter, loc_filter, search_term)
     
-    # 3. GHT & GMT Category (Trucks including JETTY)
-    # MODIFIKASI: Mengeluarkan unit SMP, GPE, dan KAI agar fokus ke MGE saja
-    ght_mask = (
-        (filtered_df["Unit"].str.contains("GHT|GMT|DT-|JETTY|TR-|HAULER", case=False, na=False) |
-         filtered_df["Group"].str.contains("HAULING|MINING|JETTY|GHT|GMT|JO MGE|PRODUKSI", case=False, na=False))
-        & ~filtered_df["Unit"].str.contains("SMP|GPE|KAI", case=False, na=False)
-    ) & ~bus_mask & ~lv_mask
+    # Agregat KPI + chart: dihitung sekali per (dataset, filter), dipakai ulang tiap autorefresh
+    aggregates = get_aggregate_cache().get_or_compute(
+        (filter_index.version, filter_state_key(shift_filter, unit_filter, loc_filter, search_term)),
+        lambda: compute_dashboard_aggregates(filtered_df)
+    )
 
-    # 4. OTHER SUPPORT (Fuel, A2B, etc.) - Units that don't match the above
-    support_mask = ~(ght_mask | bus_mask | lv_mask)
+    # --- SPACER: FILTER TO KPI (Separation of Concerns) ---
+    st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
 
-    # Break into DataFrames
-    ght_df = filtered_df[ght_mask].copy()
-    bus_df = filtered_df[bus_mask].copy()
-    lv_df = filtered_df[lv_mask].copy()
-    support_df = filtered_df[support_mask].copy()
-    
-    # --- ROW 1: 3 CHARTS ---
-    col_r1_1, col_r1_2, col_r1_3 = st.columns(3, gap="medium")
-
-    with col_r1_1:
-        # 1. GHT & GMT Chart
-        ght_idle_stats = ght_df.groupby("Unit")["Idling (Jam)"].sum().sort_values(ascending=False).head(10).reset_index()
-        ght_idle_stats.columns = ['Unit', 'Hours']
-
-        if len(ght_idle_stats) > 0:
-            max_val = ght_idle_stats['Hours'].max()
-            bars1 = alt.Chart(ght_idle_stats).mark_bar(color='#f97316', cornerRadiusEnd=6).encode(
-                x=alt.X('Hours:Q', title=None, scale=alt.Scale(domain=[0, max_val * 1.15]), axis=alt.Axis(grid=False, labels=False, ticks=False, domain=False)),
-                y=alt.Y('Unit:N', sort='-x', title=None, axis=alt.Axis(labelLimit=180, labelFontSize=10, labelColor='#555555', labelFontWeight=500, tickSize=0, domain=False)),
-                tooltip=[alt.Tooltip('Unit', title='Unit'), alt.Tooltip('Hours', title='Idle (Jam)', format='.1f')]
-            )
-            text1 = bars1.mark_text(align='left', dx=5, color='#f97316', fontSize=11, fontWeight='bold').encode(text=alt.Text('Hours:Q', format='.1f'))
-            final_chart1 = (bars1 + text1).properties(
-                height=280, padding={'left': 10, 'right': 25, 'top': 10, 'bottom': 10},
-                title=alt.TitleParams(text='1. Top 10 GHT & GMT', anchor='start', fontSize=15, fontWeight=700, color='#1e293b', offset=10)
-            ).configure(background='transparent').configure_view(stroke=None)
-            st.altair_chart(final_chart1, use_container_width=True, theme=None)
-        else:
-            st.info("No GHT & GMT data found for selected period")
-
-    with col_r1_2:
-        # 2. BUS Chart
-        bus_idle_stats = bus_df.groupby("Unit")["Idling (Jam)"].sum().sort_values(ascending=False).head(10).reset_index()
-        bus_idle_stats.columns = ['Unit', 'Hours']
-
-        if len(bus_idle_stats) > 0:
-            max_val_bus = bus_idle_stats['Hours'].max()
-            bars2 = alt.Chart(bus_idle_stats).mark_bar(color='#6366f1', cornerRadiusEnd=6).encode(
-                x=alt.X('Hours:Q', title=None, scale=alt.Scale(domain=[0, max_val_bus * 1.15]), axis=alt.Axis(grid=False, labels=False, ticks=False, domain=False)),
-                y=alt.Y('Unit:N', sort='-x', title=None, axis=alt.Axis(labelLimit=180, labelFontSize=9, labelColor='#555555', labelFontWeight=500, tickSize=0, domain=False)),
-                tooltip=[alt.Tooltip('Unit', title='Unit'), alt.Tooltip('Hours', title='Idle (Jam)', format='.1f')]
-            )
-            text2 = bars2.mark_text(align='left', dx=5, color='#4f46e5', fontSize=11, fontWeight='bold').encode(text=alt.Text('Hours:Q', format='.1f'))
-            final_chart2 = (bars2 + text2).properties(
-                height=280, padding={'left': 10, 'right': 25, 'top': 10, 'bottom': 10},
-                title=alt.TitleParams(text='2. Top 10 BUS', anchor='start', fontSize=15, fontWeight=700, color='#1e293b', offset=10)
-            ).configure(background='transparent').configure_view(stroke=None)
-            st.altair_chart(final_chart2, use_container_width=True, theme=None)
-        else:
-            st.info("No BUS data found for selected period")
-
-    with col_r1_3:
-        # 3. LV Chart
-        lv_idle_stats = lv_df.groupby("Unit")["Idling (Jam)"].sum().sort_values(ascending=False).head(10).reset_index()
-        lv_idle_stats.columns = ['Unit', 'Hours']
-
-        if len(lv_idle_stats) > 0:
-            max_val_lv = lv_idle_stats['Hours'].max()
-            bars3 = alt.Chart(lv_idle_stats).mark_bar(color='#38CE3C', cornerRadiusEnd=6).encode(
-                x=alt.X('Hours:Q', title=None, scale=alt.Scale(domain=[0, max_val_lv * 1.15]), axis=alt.Axis(grid=False, labels=False, ticks=False, domain=False)),
-                y=alt.Y('Unit:N', sort='-x', title=None, axis=alt.Axis(labelLimit=180, labelFontSize=10, labelColor='#555555', labelFontWeight=500, tickSize=0, domain=False)),
-                tooltip=[alt.Tooltip('Unit', title='Unit'), alt.Tooltip('Hours', title='Idle (Jam)', format='.1f')]
-            )
-            text3 = bars3.mark_text(align='left', dx=5, color='#38CE3C', fontSize=11, fontWeight='bold').encode(text=alt.Text('Hours:Q', format='.1f'))
-            final_chart3 = (bars3 + text3).properties(
-                height=280, padding={'left': 10, 'right': 25, 'top': 10, 'bottom': 10},
-                title=alt.TitleParams(text='3. Top 10 Light Vehicle (LV)', anchor='start', fontSize=15, fontWeight=700, color='#1e293b', offset=10)
-            ).configure(background='transparent').configure_view(stroke=None)
-            st.altair_chart(final_chart3, use_container_width=True, theme=None)
-        else:
-            st.info("No LV data found for selected period")
+    render_kpi_cards(aggregates)
+
+    # --- SPACER: KPI TO CHARTS ---
+    st.markdown("<div style='height: 1.5rem;'></div>", unsafe_allow_html=True)
+
+    render_top10_charts(aggregates)
 
     # --- SPACER: ROW 1 TO ROW 2 (Disamakan dengan gap kolom 'medium' ~1rem) ---
     st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
@@ -1551,181 +3314,18 @@ if 'data_df' in st.session_state:
 
     with col_r2_1:
         # Chart 4: Produktivitas - Stacked Bar (Motion vs Idle)
-        prod_data = filtered_df.groupby("Unit").agg({
-            "Motion (Jam)": "sum",
-            "Idling (Jam)": "sum"
-        }).reset_index()
-        
-        prod_data["Total"] = prod_data["Motion (Jam)"] + prod_data["Idling (Jam)"]
-        prod_data = prod_data.sort_values("Idling (Jam)", ascending=False).head(10)
-        
-        if len(prod_data) > 0:
-            chart_data = prod_data.melt(
-                id_vars=['Unit', 'Total'],
-                value_vars=['Motion (Jam)', 'Idling (Jam)'],
-                var_name='Activity',
-                value_name='Hours'
-            )
-            
-            chart_data['Activity'] = chart_data['Activity'].replace({
-                'Motion (Jam)': 'Motion',
-                'Idling (Jam)': 'Idle'
-            })
-            
-            unit_order = prod_data['Unit'].tolist()
-            chart_data['Activity'] = pd.Categorical(chart_data['Activity'], categories=['Idle', 'Motion'], ordered=True)
-            chart_data = chart_data.sort_values(['Unit', 'Activity'])
-            
-            # Hitung posisi mid-point untuk label
-            chart_data_sorted = chart_data.sort_values(['Unit', 'Activity']).copy()
-            chart_data_sorted['cumsum'] = chart_data_sorted.groupby('Unit')['Hours'].cumsum()
-            chart_data_sorted['y_mid'] = chart_data_sorted['cumsum'] - (chart_data_sorted['Hours'] / 2)
-            
-            # Stacked Bar Chart (tanpa properties dulu)
-            bars_prod = alt.Chart(chart_data_sorted).mark_bar(
-                cornerRadiusTopLeft=4,
-                cornerRadiusTopRight=4
-            ).encode(
-                x=alt.X('Unit:N', 
-                    sort=unit_order, 
-                    title=None, 
-                    axis=alt.Axis(
-                        labelAngle=-45, 
-                        labelFontSize=9, 
-                        labelColor='#64748b',
-                        labelFontWeight=500
-                    )
-                ),
-                y=alt.Y('Hours:Q', 
-                    title='Jam', 
-                    stack='zero',
-                    axis=alt.Axis(
-                        grid=True, 
-                        gridColor='#f1f5f9', 
-                        gridDash=[2, 4],
-                        titleFontSize=10,
-                        titleColor='#64748b'
-                    )
-                ),
-                color=alt.Color('Activity:N', 
-                    scale=alt.Scale(domain=['Idle', 'Motion'], range=['#FF4D6B', '#38CE3C']),
-                    legend=alt.Legend(
-                        orient='top-right',
-                        direction='horizontal',
-                        title=None,
-                        labelFontSize=10,
-                        labelColor='#64748b',
-                        symbolSize=60,
-                        offset=0
-                    )
-                ),
-                order=alt.Order('Activity:N', sort='ascending'),
-                tooltip=[
-                    alt.Tooltip('Unit', title='Unit'),
-                    alt.Tooltip('Activity', title='Aktivitas'),
-                    alt.Tooltip('Hours:Q', title='Jam', format='.1f')
-                ]
-            )
-            
-            # Text label di tengah setiap segment (hanya jika cukup besar)
-            text_prod = alt.Chart(chart_data_sorted[chart_data_sorted['Hours'] > 0.5]).mark_text(
-                align='center',
-                baseline='middle',
-                fontSize=10,  # REVISI: 10px
-                fontWeight=600,
-                color='white'
-            ).encode(
-                x=alt.X('Unit:N', sort=unit_order),
-                y=alt.Y('y_mid:Q'),
-                text=alt.Text('Hours:Q', format='.1f')
-            )
-            
-            # Gabung + properties dengan padding + configure
-            final_chart4 = (bars_prod + text_prod).properties(
-                height=280,
-                padding={'left': 20, 'right': 35, 'top': 10, 'bottom': 10},
-                title=alt.TitleParams(
-                    text='4. Produktivitas: Rasio Jalan vs Diam',
-                    anchor='start',
-                    fontSize=15,
-                    fontWeight=700,
-                    color='#1e293b',
-                    offset=10
-                )
-            ).configure(
-                background='transparent'
-            ).configure_view(stroke=None)
-            
-            st.altair_chart(final_chart4, use_container_width=True, theme=None)
+        chart_data_sorted = aggregates["prod_chart_data"]
+
+        if chart_data_sorted is not None:
+            st.vega_lite_chart(spec=chart_spec("productivity", chart_data_sorted, unit_order=aggregates["unit_order"]),
+                               use_container_width=True, theme=None)
 
     with col_r2_2:
         # Chart 5: Peak Hours - Vertical Bar Chart
-        filtered_df['Start_Hour'] = pd.to_datetime(filtered_df['Beginning'], format="%d.%m.%Y %H:%M:%S", errors='coerce').dt.hour
-        hourly_activity = filtered_df.groupby("Start_Hour").size().reset_index(name='Trip_Count')
+        hourly_activity = aggregates["hourly_activity"]
 
         if len(hourly_activity) > 0:
-            # Bar chart - YELLOW untuk Peak Hours
-            peak_bars = alt.Chart(hourly_activity).mark_bar(
-                color='#FACC15',
-                cornerRadiusTopLeft=4,
-                cornerRadiusTopRight=4
-            ).encode(
-                x=alt.X('Start_Hour:O', 
-                    title='Jam', 
-                    axis=alt.Axis(
-                        labelAngle=0, 
-                        labelFontSize=9, 
-                        labelColor='#64748b',
-                        labelFontWeight=500,
-                        titleFontSize=10,
-                        titleColor='#64748b'
-                    )
-                ),
-                y=alt.Y('Trip_Count:Q', 
-                    title='Trip',
-                    axis=alt.Axis(
-                        grid=True,
-                        gridColor='#f1f5f9',
-                        gridDash=[2, 4],
-                        titleFontSize=10,
-                        titleColor='#64748b'
-                    )
-                ),
-                tooltip=[
-                    alt.Tooltip('Start_Hour', title='Jam'), 
-                    alt.Tooltip('Trip_Count', title='Total Trip')
-                ]
-            )
-            
-            # Text labels - Orange gelap agar terbaca
-            text_peak = peak_bars.mark_text(
-                align='center', 
-                baseline='bottom', 
-                dy=-4, 
-                color='#d97706', 
-                fontSize=10,  # REVISI: 10px
-                fontWeight=600
-            ).encode(
-                text=alt.Text('Trip_Count:Q')
-            )
-            
-            # Gabung + properties dengan padding + configure
-            final_chart5 = (peak_bars + text_peak).properties(
-                height=280,
-                padding={'left': 20, 'right': 35, 'top': 10, 'bottom': 10},
-                title=alt.TitleParams(
-                    text='5. Peak Hours',
-                    anchor='start',
-                    fontSize=15,
-                    fontWeight=700,
-                    color='#1e293b',
-                    offset=10
-                )
-            ).configure(
-                background='transparent'
-            ).configure_view(stroke=None)
-
-            st.altair_chart(final_chart5, use_container_width=True, theme=None)
+            st.vega_lite_chart(spec=chart_spec("peak_hours", hourly_activity), use_container_width=True, theme=None)
 
     st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
 
@@ -1743,34 +3343,58 @@ if 'data_df' in st.session_state:
         """, unsafe_allow_html=True)
     
     with table_header_col2:
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            export_df = filtered_df[[
-                "Date", "Shift", "Group", "Unit", 
-                "Beginning", "Initial Location", "Final Location",
-                "In Motion", "Mileage", "Idling"
-            ]].copy()
-            export_df.insert(0, "No", range(1, len(export_df) + 1))
-            export_df.to_excel(writer, index=False, sheet_name='Idle Data')
-        excel_data = output.getvalue()
+        export_format = st.selectbox(
+            "Format Export", options=list(EXPORT_FORMATS),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt]["label"], label_visibility="collapsed"
+        )
+        export_key = (
+            filter_index.version,
+            filter_state_key(shift_filter, unit_filter, loc_filter, search_term),
+            export_format,
+        )
         
+        # File baru dibuat saat tombol diklik (callable), hasilnya di-cache per dataset + filter + format
         st.download_button(
-            label="📥 Export to Excel",
-            data=excel_data,
-            file_name=f"Idle_Report_{start_date}_{end_date}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            label=f"📥 Export to {EXPORT_FORMATS[export_format]['label']}",
+            data=lambda: get_export_cache().get_or_compute(export_key, lambda: build_export(filtered_df, export_format)),
+            file_name=f"Idle_Report_{start_date}_{end_date}.{export_format}",
+            mime=EXPORT_FORMATS[export_format]["mime"],
             use_container_width=True
         )
     
-    display_df = filtered_df[[
-        "Date", "Shift", "Group", "Unit", 
-        "Beginning", "Initial Location", "Final Location", 
-        "In Motion", "Mileage", "Idling"
-    ]].copy()
-    display_df.insert(0, "No", range(1, len(display_df) + 1))
-    
+    # Hanya page aktif yang di-serialize ke browser; total dari hasil filter index
+    total_rows = len(filtered_df)
+    table_cols = st.columns([1, 1.5, 1, 1, 2.5])
+    with table_cols[0]:
+        page_size = st.selectbox("Rows / page", options=TABLE_PAGE_SIZES,
+                                 index=TABLE_PAGE_SIZES.index(TABLE_DEFAULT_PAGE_SIZE), key="table_page_size")
+    with table_cols[1]:
+        sort_column = st.selectbox("Sort", options=[None] + list(TABLE_SORT_COLUMNS),
+                                   format_func=lambda col: "Default" if col is None else col, key="table_sort_column")
+    with table_cols[2]:
+        sort_ascending = st.selectbox("Order", options=[True, False],
+                                      format_func=lambda asc: "Naik ↑" if asc else "Turun ↓", key="table_sort_order",
+                                      disabled=sort_column is None)
+    total_pages = max(1, -(-total_rows // page_size))
+    with table_cols[3]:
+        # Key ikut dataset + filter + page size: ganti filter / ukuran page -> kembali ke page 1
+        page_key = hashlib.sha1(repr((filter_index.version, filter_state_key(shift_filter, unit_filter, loc_filter, search_term), page_size)).encode()).hexdigest()[:12]
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=f"table_page_{page_key}")
+    with table_cols[4]:
+        first_row = min((page - 1) * page_size + 1, total_rows)
+        last_row = min(page * page_size, total_rows)
+        st.markdown(f"<div style='padding-top: 2rem; font-size: 0.8rem; color: #64748b;'>"
+                    f"Menampilkan {first_row:,}–{last_row:,} dari {total_rows:,} rows · page {page} / {total_pages}</div>",
+                    unsafe_allow_html=True)
+
+    table_order = get_table_order_cache().get_or_compute(
+        (filter_index.version, filter_state_key(shift_filter, unit_filter, loc_filter, search_term), sort_column, sort_ascending),
+        lambda: table_sort_order(filtered_df, sort_column, sort_ascending)
+    )
+    display_df = table_page(filtered_df, page, page_size, table_order)
+
     st.dataframe(
-        display_df, 
+        display_df,
         use_container_width=True,
         hide_index=True,
         height=400
@@ -0,0 +1,349 @@
+"""
+Wialon lokal untuk load test end-to-end, plus load driver.
+
+Server HTTP menjawab endpoint Wialon (token/login, core/search_items, report/*, core/batch) dengan data
+SyntheticWialon dari benchmark.py, ditambah latency, error injection dan session expiry yang bisa diatur.
+Seperti Wialon asli, call dalam satu SID diproses berurutan dan satu SID hanya memegang satu report result.
+
+    python mock_wialon.py serve --port 8765 --units 300 --days 3 --latency-ms 40 --session-ttl 60
+    WIALON_HOST=http://127.0.0.1:8765/wialon/ajax.html streamlit run dashboard.py
+
+    python mock_wialon.py load --host http://127.0.0.1:8765/wialon/ajax.html --loads 20 --concurrency 4
+    python mock_wialon.py load --spawn --loads 10 --concurrency 4 --throttle-rate 0.02   # server di proses ini
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import requests
+
+from benchmark import DEFAULT_START_DATE, DEFAULT_TEMPLATE_ID, SyntheticWialon, load_dashboard, load_range
+
+DEFAULT_PORT = 8765
+WIALON_PATH = "/wialon/ajax.html"
+STATS_PATH = "/stats"
+
+ERROR_THROTTLED = 1003
+ERROR_INJECTED = 5         # "Error performing request" untuk call report / search
+INJECTABLE_SERVICES = ("core/search_items", "core/batch")
+INJECTABLE_PREFIX = "report/"
+
+
+class MockWialonService:
+    """
+    SyntheticWialon + perilaku server: latency (dengan jitter), HTTP 503, error throttle 1003,
+    error Wialon acak untuk call report / search, dan SID yang expired setelah idle session_ttl detik.
+    """
+    def __init__(self, responder, latency_ms=0.0, jitter_ms=0.0, http_error_rate=0.0, throttle_rate=0.0,
+                 error_rate=0.0, session_ttl=None, serialize_sessions=True, seed=None):
+        self.responder = responder
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.http_error_rate = http_error_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.serialize_sessions = serialize_sessions
+        self._random = random.Random(seed)
+        self._last_seen = {}       # sid -> waktu call terakhir (monotonic)
+        self._sid_locks = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._started = time.monotonic()
+
+    def _roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def _sid_lock(self, sid):
+        with self._lock:
+            return self._sid_locks.setdefault(sid, threading.Lock())
+
+    def _expire_idle(self, sid):
+        """Session idle lebih dari session_ttl dibuang, call berikutnya dapat error 1 (invalid session)."""
+        if not sid or self.session_ttl is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            last_seen = self._last_seen.get(sid)
+            expired = last_seen is not None and now - last_seen > self.session_ttl
+            self._last_seen[sid] = now
+            if expired:
+                del self._last_seen[sid]
+                self._stats["sessions_expired"] += 1
+        if expired:
+            self.responder.expire_session(sid)
+
+    def handle(self, fields):
+        """(HTTP status, body JSON) untuk satu request Wialon."""
+        svc = fields.get("svc", "")
+        sid = fields.get("sid")
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats[f"svc:{svc}"] += 1
+
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        if self._roll(self.http_error_rate):
+            return self._injected("http_503", 503, json.dumps({"error": "Service Unavailable"}))
+        if self._roll(self.throttle_rate):
+            return self._injected("throttled", 200, json.dumps({"error": ERROR_THROTTLED}))
+        if (svc.startswith(INJECTABLE_PREFIX) or svc in INJECTABLE_SERVICES) and self._roll(self.error_rate):
+            return self._injected("wialon_error", 200, json.dumps({"error": ERROR_INJECTED}))
+
+        self._expire_idle(sid)
+        if svc == "token/login" or not self.serialize_sessions or not sid:
+            body = self.responder.handle_fields(fields)
+        else:
+            # Satu SID = satu antrian di server Wialon
+            with self._sid_lock(sid):
+                body = self.responder.handle_fields(fields)
+        if svc == "token/login":
+            login = json.loads(body)
+            if "eid" in login:
+                with self._lock:
+                    self._last_seen[login["eid"]] = time.monotonic()
+        return 200, body
+
+    def _injected(self, kind, status, body):
+        with self._lock:
+            self._stats[f"injected:{kind}"] += 1
+        return status, body
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "uptime_seconds": time.monotonic() - self._started,
+            "start_date": self.responder.start_date.isoformat(),
+            "days": self.responder.days,
+            "template_id": self.responder.template_id,
+            "units": len(self.responder.unit_names),
+            "groups": len(self.responder.group_names),
+            "trips": self.responder.trip_count,
+            "stats": stats,
+        }
+
+
+def make_handler(service):
+    class MockWialonHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, sama seperti connection pool dashboard
+
+        def _reply(self, status, body):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == STATS_PATH:
+                self._reply(200, json.dumps(service.stats()))
+                return
+            self._reply(*service.handle(dict(parse_qsl(url.query))))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            fields = dict(parse_qsl(urlsplit(self.path).query))
+            fields.update(parse_qsl(self.rfile.read(length).decode("utf-8")))
+            self._reply(*service.handle(fields))
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockWialonHandler
+
+
+def start_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    """Jalankan server di background thread, kembalikan (server, URL ajax.html)."""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-wialon", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{WIALON_PATH}"
+
+
+def service_from_args(args):
+    responder = SyntheticWialon(
+        units=args.units, groups=args.groups, overlap=args.overlap, trips_per_day=args.trips_per_day,
+        days=args.days, crossover=args.crossover, start_date=args.start_date, template_id=args.template_id,
+        token=args.token, seed=args.seed,
+    )
+    return MockWialonService(
+        responder, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, http_error_rate=args.http_error_rate,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, session_ttl=args.session_ttl,
+        serialize_sessions=not args.parallel_sessions, seed=args.seed,
+    )
+
+
+def fetch_stats(wialon_url):
+    url = urlsplit(wialon_url)
+    return requests.get(f"{url.scheme}://{url.netloc}{STATS_PATH}", timeout=10).json()
+
+
+# --- LOAD DRIVER ---
+def run_load_driver(wialon_url, loads, concurrency, rate_limit=True, token=None):
+    """
+    Jalankan `loads` Load (fetch + build + stitch, tanpa cache) dengan `concurrency` user paralel di satu proses
+    dashboard, seperti beberapa browser yang klik Load bersamaan. Kembalikan ringkasan latency + call/detik.
+    """
+    os.environ["WIALON_HOST"] = wialon_url
+    os.environ["WIALON_TOKEN"] = token or "mock-token"   # Token produksi tidak pernah dikirim ke mock
+    dashboard = load_dashboard()
+    if not rate_limit:
+        dashboard.RATE_LIMIT_INITIAL = dashboard.RATE_LIMIT_MAX = 1e9
+
+    dataset = fetch_stats(wialon_url)
+    dashboard.TEMPLATE_ID = dataset["template_id"]
+    start_time, filter_end_time, production_days, intervals = load_range(
+        dashboard, date.fromisoformat(dataset["start_date"]), dataset["days"]
+    )
+
+    def one_load(_):
+        started = time.perf_counter()
+        try:
+            sid = dashboard.wialon_token_login()
+            resource_id = dashboard.get_resource_id(sid) if sid else None
+            if not resource_id:
+                return time.perf_counter() - started, "login / resource failed", 0
+            day_rows = dashboard.fetch_interval_rows(sid, resource_id, intervals)
+            if any(rows is None for rows in day_rows):
+                return time.perf_counter() - started, "fetch failed", 0
+            frames = [dashboard.slice_production_day(dashboard.build_trip_frame(rows), day)
+                      for day, rows in zip(production_days, day_rows) if rows]
+            df = dashboard.stitch_trip_frames(frames, start_time, filter_end_time, show_toast=False) if frames else None
+            trips = 0 if df is None else len(df)
+            # Load "sukses" yang kehilangan (atau menggandakan) trip tetap dihitung error
+            if trips != dataset["trips"]:
+                kind = "short load" if trips < dataset["trips"] else "extra trips"
+                return time.perf_counter() - started, f"{kind}: {trips}/{dataset['trips']} trips", trips
+            return time.perf_counter() - started, None, trips
+        except Exception as exc:
+            return time.perf_counter() - started, repr(exc), 0
+
+    before = fetch_stats(wialon_url)["stats"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-driver") as executor:
+        outcomes = list(executor.map(one_load, range(loads)))
+    elapsed = time.perf_counter() - started
+    after = fetch_stats(wialon_url)["stats"]
+
+    latencies = np.array([seconds for seconds, error, _ in outcomes if error is None])
+    calls = after.get("calls", 0) - before.get("calls", 0)
+    return {
+        "loads": loads,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": Counter(error for _, error, _ in outcomes if error is not None),
+        "trips_per_load": sorted({trips for _, error, trips in outcomes if error is None}),
+        "expected_trips": dataset["trips"],
+        "elapsed_seconds": elapsed,
+        "calls": calls,
+        "calls_per_second": calls / elapsed if elapsed > 0 else 0.0,
+        "load_p50_seconds": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "load_p95_seconds": float(np.percentile(latencies, 95)) if len(latencies) else None,
+        "server": {key: after.get(key, 0) - before.get(key, 0) for key in after if not key.startswith("svc:")},
+        "rate_limiter": dashboard.get_rate_limiter().snapshot(),
+    }
+
+
+def print_load_report(report):
+    p50, p95 = report["load_p50_seconds"], report["load_p95_seconds"]
+    print(f"Loads          {report['succeeded']}/{report['loads']} ok · concurrency {report['concurrency']} · "
+          f"{report['elapsed_seconds']:.1f}s")
+    print(f"Trips / Load   {', '.join(f'{trips:,}' for trips in report['trips_per_load']) or '-'} "
+          f"(mock {report['expected_trips']:,})")
+    print(f"Wialon calls   {report['calls']:,} · {report['calls_per_second']:.1f} call/s")
+    if p50 is not None:
+        print(f"Load latency   p50 {p50:.2f}s · p95 {p95:.2f}s")
+    for error, count in report["errors"].items():
+        print(f"Load error     {count}x {error}")
+    print(f"Server         {json.dumps(report['server'])}")
+    limiter = report["rate_limiter"]
+    print(f"Rate limiter   {limiter['rate']:.1f} call/s · throttled {limiter['throttled']} · "
+          f"latency {limiter['latency']:.3f}s")
+
+
+def add_dataset_args(parser):
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--overlap", type=float, default=0.2, help="fraksi unit yang juga member grup lain")
+    parser.add_argument("--trips-per-day", type=int, default=24)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--crossover", type=float, default=0.05, help="fraksi trip akhir hari yang melewati 06:00")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=DEFAULT_START_DATE)
+    parser.add_argument("--template-id", type=int, default=DEFAULT_TEMPLATE_ID)
+    parser.add_argument("--token", help="token yang diterima token/login (default: semua token)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="variasi latency +/-")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraksi call dijawab HTTP 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraksi call dijawab error 1003")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraksi call report / search dijawab error 5")
+    parser.add_argument("--session-ttl", type=float, help="SID expired setelah idle sekian detik (error 1)")
+    parser.add_argument("--parallel-sessions", action="store_true",
+                        help="proses call dalam satu SID paralel (default berurutan seperti Wialon)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Wialon lokal + load driver untuk dashboard.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="jalankan mock server")
+    serve.add_argument("--bind", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_dataset_args(serve)
+
+    load = commands.add_parser("load", help="jalankan load driver")
+    load.add_argument("--host", help="URL ajax.html mock server (default: --spawn)")
+    load.add_argument("--spawn", action="store_true", help="jalankan mock server di proses ini")
+    load.add_argument("--loads", type=int, default=10)
+    load.add_argument("--concurrency", type=int, default=4)
+    load.add_argument("--no-rate-limit", action="store_true", help="matikan rate limiter produksi")
+    load.add_argument("--json", help="tulis hasil ke file JSON")
+    add_dataset_args(load)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service = service_from_args(args)
+        server, url = start_server(service, args.bind, args.port)
+        print(f"Mock Wialon: {url}  ({service.stats()['units']} unit, {args.days} hari mulai {args.start_date})")
+        print(f"Dashboard:   WIALON_HOST={url} streamlit run dashboard.py")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    if not args.host and not args.spawn:
+        parser.error("load: isi --host atau pakai --spawn")
+    server = None
+    wialon_url = args.host
+    if args.spawn:
+        server, wialon_url = start_server(service_from_args(args), port=0)
+    try:
+        report = run_load_driver(wialon_url, args.loads, args.concurrency, not args.no_rate_limit, args.token)
+    finally:
+        if server:
+            server.shutdown()
+    print_load_report(report)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
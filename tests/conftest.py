@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import benchmark
+
+
+@pytest.fixture(scope="session")
+def dashboard():
+    """Bagian library dashboard.py (tanpa UI), di-load sekali untuk semua test."""
+    return benchmark.load_dashboard()
+
+
+@pytest.fixture
+def synthetic_wialon(dashboard, monkeypatch, tmp_path):
+    """SyntheticWialon kecil di belakang HTTP session dashboard; day store di tmp_path, dikembalikan setelah test."""
+    for name in ("get_http_session", "TEMPLATE_ID", "RATE_LIMIT_INITIAL", "RATE_LIMIT_MAX"):
+        monkeypatch.setattr(dashboard, name, getattr(dashboard, name))
+    monkeypatch.setattr(dashboard, "DAY_STORE_DIR", str(tmp_path / "production_days"))
+    responder = benchmark.SyntheticWialon(units=24, groups=4, trips_per_day=8, days=1)
+    benchmark.install_responder(dashboard, responder)
+    yield responder
+    dashboard.st.cache_resource.clear()
+    dashboard.st.cache_data.clear()
@@ -0,0 +1,30 @@
+"""
+AggregateCache dengan max_bytes (cache export): total ukuran bytes yang tersimpan dibatasi,
+bukan hanya jumlah entry.
+"""
+
+
+def test_export_cache_evicts_by_total_bytes(dashboard):
+    cache = dashboard.AggregateCache(max_entries=8, max_bytes=250)
+
+    for key in "abc":
+        cache.get_or_compute(key, lambda: b"x" * 100)
+
+    assert list(cache._entries) == ["b", "c"]
+    assert cache._total_bytes == 200
+
+
+def test_export_larger_than_budget_is_not_cached(dashboard):
+    cache = dashboard.AggregateCache(max_entries=8, max_bytes=250)
+    cache.get_or_compute("small", lambda: b"x" * 100)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return b"x" * 300
+
+    assert len(cache.get_or_compute("big", build)) == 300
+    cache.get_or_compute("big", build)
+
+    assert len(calls) == 2
+    assert list(cache._entries) == ["small"]
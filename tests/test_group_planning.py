@@ -0,0 +1,18 @@
+"""Planning grup: unit yang overlap di beberapa grup hanya di-download sekali (reportObjectIdList)."""
+import benchmark
+
+
+def test_partial_groups_only_download_assigned_units(dashboard, synthetic_wialon, monkeypatch):
+    downloaded = []
+    subrow = synthetic_wialon._subrow
+    monkeypatch.setattr(synthetic_wialon, "_subrow", lambda *args: downloaded.append(1) or subrow(*args))
+    _, _, _, intervals = benchmark.load_range(dashboard, synthetic_wialon.start_date, 1)
+    sid = dashboard.wialon_token_login()
+
+    planned = dashboard.plan_group_reports(sid)
+    rows = dashboard.fetch_interval_rows(sid, dashboard.get_resource_id(sid), intervals)[0]
+
+    assert any(allowed_units is not None for _, _, allowed_units, _ in planned)
+    assert sum(len(unit_ids) for _, _, _, unit_ids in planned) == len(synthetic_wialon.unit_names)
+    # Tanpa reportObjectIdList sub-row unit overlap ikut di-download di grup kedua lalu dibuang saat decode
+    assert len(downloaded) == len(rows) > 0
@@ -0,0 +1,25 @@
+"""
+parse_duration_series vs parse_duration_to_minutes per-row,
+termasuk cell rusak / digit non-ASCII yang harus jadi 0.0 tanpa raise.
+"""
+import pandas as pd
+
+VALID_DURATIONS = ["00:00:00", "01:02:03", " 12:30:45 ", "1 day 02:00:00", "2 days 01:00:30", "-", "", None]
+MALFORMED_DURATIONS = ["abc", "1:2", "1:2:3:4", "day", "x day 01:00:00", "01:00:xx", "１:00:00", "٣:00:00", "1 day ０1:00:00"]
+
+
+def test_parse_duration_series_matches_per_row(dashboard):
+    durations = pd.Series(VALID_DURATIONS + ["5:07:09", "10 days 00:00:01"])
+
+    expected = [dashboard.parse_duration_to_minutes(value) for value in durations]
+
+    assert dashboard.parse_duration_series(durations).tolist() == expected
+
+
+def test_parse_duration_series_malformed_cells_are_zero(dashboard):
+    durations = pd.Series(MALFORMED_DURATIONS + ["01:00:00"])
+
+    minutes = dashboard.parse_duration_series(durations)
+
+    assert minutes.tolist() == [0.0] * len(MALFORMED_DURATIONS) + [60.0]
+
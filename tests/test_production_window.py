@@ -0,0 +1,178 @@
+"""
+Ekuivalensi production window vectorized (tag_production_calendar / apply_production_window)
+dengan versi per-row dari baseline (get_work_day / get_work_shift / truncation via .apply).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROW_COLUMNS = [
+    "Date", "Shift", "Group", "No", "Unit",
+    "Beginning", "Initial Location", "Final Location",
+    "In Motion", "Mileage", "Idling"
+]
+
+
+# --- BASELINE (per-row, disalin dari fetch_and_process_data sebelum vectorize) ---
+def baseline_work_day(dt):
+    if pd.isna(dt): return ""
+    # Jika jam < 06:00, berarti masih bagian dari Work Day kemarin (Night Shift)
+    if dt.hour < 6:
+        return (dt - timedelta(days=1)).strftime("%Y-%m-%d")
+    else:
+        return dt.strftime("%Y-%m-%d")
+
+
+def baseline_work_shift(dt):
+    if pd.isna(dt): return "Unknown"
+    return "Day" if 6 <= dt.hour < 18 else "Night"
+
+
+def baseline_production_window(dashboard, rows, start_time, filter_end_time):
+    parse_duration_to_minutes = dashboard.parse_duration_to_minutes
+    df = pd.DataFrame(rows, columns=ROW_COLUMNS)
+    df["Beginning_DT"] = pd.to_datetime(df["Beginning"].str.strip(), format="%d.%m.%Y %H:%M:%S", errors='coerce')
+    df["Beginning_DT"] = df["Beginning_DT"].dt.tz_localize(dashboard.TIMEZONE)
+    df["Unit"] = df["Unit"].str.strip()
+    df["Group"] = df["Group"].str.strip()
+    df = df.drop_duplicates(subset=["Unit", "Beginning_DT"]).reset_index(drop=True)
+    df["Duration_Jam"] = (df["In Motion"].apply(parse_duration_to_minutes) / 60) + \
+                         (df["Idling"].apply(parse_duration_to_minutes) / 60)
+    df["Ending_DT"] = df["Beginning_DT"] + pd.to_timedelta(df["Duration_Jam"], unit='h')
+
+    mask_in_window = (
+        (df["Beginning_DT"] >= start_time) & (df["Beginning_DT"] < filter_end_time)
+    ) | (
+        (df["Beginning_DT"] < start_time) & (df["Ending_DT"] > start_time)
+    )
+    df = df[mask_in_window].copy()
+    df["Effective_Start"] = df["Beginning_DT"].apply(lambda x: max(x, start_time))
+    df["Effective_End"] = df["Ending_DT"].apply(lambda x: min(x, filter_end_time))
+    df["Original_Duration_Jam"] = (df["Ending_DT"] - df["Beginning_DT"]).dt.total_seconds() / 3600
+    df["In_Window_Duration_Jam"] = (df["Effective_End"] - df["Effective_Start"]).dt.total_seconds() / 3600
+    df["In_Window_Duration_Jam"] = df["In_Window_Duration_Jam"].clip(lower=0)
+    df["Truncation_Ratio"] = df.apply(
+        lambda x: x["In_Window_Duration_Jam"] / x["Original_Duration_Jam"] if x["Original_Duration_Jam"] > 0 else 0,
+        axis=1
+    )
+    df["Date"] = df["Effective_Start"].apply(baseline_work_day)
+    df["Shift"] = df["Effective_Start"].apply(baseline_work_shift)
+
+    df = df.sort_values(by="Beginning_DT", ascending=True).reset_index(drop=True)
+    df["No"] = range(1, len(df) + 1)
+    df = df.drop(columns=["Beginning_DT"])
+    df["Idling (Jam)"] = (df["Idling"].apply(parse_duration_to_minutes) / 60) * df["Truncation_Ratio"]
+    df["Motion (Jam)"] = (df["In Motion"].apply(parse_duration_to_minutes) / 60) * df["Truncation_Ratio"]
+    df["Mileage (km)"] = df["Mileage"].apply(dashboard.parse_mileage)
+    return df
+
+
+# --- DATA ---
+def format_duration(seconds):
+    days, rest = divmod(int(seconds), 86400)
+    text = f"{rest // 3600:02d}:{rest % 3600 // 60:02d}:{rest % 60:02d}"
+    if days:
+        return f"{days} day{'s' if days > 1 else ''} {text}"
+    return text
+
+
+def trip_row(unit, beginning, motion_seconds, idle_seconds, mileage="1,5 km"):
+    return [
+        "", "", "HAULER", 0, unit,
+        beginning.strftime("%d.%m.%Y %H:%M:%S"), "Pit A", "Dump B",
+        format_duration(motion_seconds), mileage, format_duration(idle_seconds)
+    ]
+
+
+def boundary_rows(day):
+    """Trip di sekitar 06:00 / 18:00 / tengah malam untuk production day `day` (naive, WITA)."""
+    d0 = datetime.combine(day, datetime.min.time())
+    cases = [
+        (d0 + timedelta(hours=5, minutes=30), 20 * 60, 40 * 60),           # menyeberang 06:00 dari window kemarin
+        (d0 + timedelta(hours=5, minutes=59, seconds=59), 0, 1),           # selesai tepat 06:00: tidak masuk
+        (d0 + timedelta(hours=5, minutes=59, seconds=59), 1, 1),           # 1 detik di dalam window
+        (d0 + timedelta(hours=6), 600, 300),                                # tepat 06:00 -> Day
+        (d0 + timedelta(hours=17, minutes=59, seconds=59), 600, 600),      # Day, menyeberang 18:00
+        (d0 + timedelta(hours=18), 300, 0),                                 # tepat 18:00 -> Night
+        (d0 + timedelta(hours=23, minutes=50), 30 * 60, 20 * 60),          # lintas tengah malam
+        (d0 + timedelta(days=1, minutes=5), 0, 0),                          # durasi 0 setelah tengah malam
+        (d0 + timedelta(days=1, hours=5, minutes=45), 30 * 60, 15 * 60),   # terpotong di 06:00 penutup
+        (d0 + timedelta(days=1, hours=6), 60, 60),                          # tepat 06:00 besok: milik hari berikutnya
+        (d0 + timedelta(hours=2), 2 * 86400, 3600),                         # "N days" durasi, mulai jauh sebelum window
+    ]
+    return [trip_row(f"HD{i:03d}", beginning, motion, idle) for i, (beginning, motion, idle) in enumerate(cases)]
+
+
+def random_rows(day, count=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    d0 = datetime.combine(day, datetime.min.time()) - timedelta(hours=6)
+    offsets = rng.integers(0, 42 * 3600, count)
+    rows = []
+    for i, offset in enumerate(offsets):
+        rows.append(trip_row(
+            f"DT{i % 80:03d}", d0 + timedelta(seconds=int(offset)),
+            int(rng.integers(0, 3 * 3600)), int(rng.integers(0, 2 * 3600)), f"{rng.random() * 40:.2f} km"
+        ))
+    return rows
+
+
+def production_window(dashboard, day):
+    start_time = dashboard.TIMEZONE.localize(datetime.combine(day, datetime.min.time()) + timedelta(hours=6))
+    return start_time, start_time + timedelta(days=1)
+
+
+# --- TESTS ---
+@pytest.mark.parametrize("rows_for", [boundary_rows, random_rows])
+def test_apply_production_window_matches_baseline(dashboard, rows_for):
+    day = datetime(2026, 3, 14).date()
+    rows = rows_for(day)
+    start_time, filter_end_time = production_window(dashboard, day)
+
+    expected = baseline_production_window(dashboard, rows, start_time, filter_end_time)
+    actual = dashboard.apply_production_window(
+        dashboard.build_trip_frame(rows), start_time, filter_end_time, show_toast=False
+    )
+
+    assert len(actual) > 0
+    pd.testing.assert_series_equal(actual["Unit"], expected["Unit"], check_dtype=False)
+    pd.testing.assert_series_equal(actual["Beginning"], expected["Beginning"], check_dtype=False)
+    pd.testing.assert_series_equal(actual["Date"], expected["Date"], check_dtype=False)
+    pd.testing.assert_series_equal(actual["Shift"], expected["Shift"], check_dtype=False)
+    for column in ["Effective_Start", "Effective_End", "Truncation_Ratio", "Idling (Jam)", "Motion (Jam)", "Mileage (km)"]:
+        pd.testing.assert_series_equal(actual[column], expected[column], check_dtype=False, rtol=1e-12)
+
+
+def test_boundary_trips_are_tagged_like_baseline(dashboard):
+    day = datetime(2026, 3, 14).date()
+    start_time, filter_end_time = production_window(dashboard, day)
+    actual = dashboard.apply_production_window(
+        dashboard.build_trip_frame(boundary_rows(day)), start_time, filter_end_time, show_toast=False
+    )
+    tagged = dict(zip(actual["Beginning"], zip(actual["Date"], actual["Shift"])))
+
+    assert tagged["14.03.2026 05:30:00"] == ("2026-03-14", "Day")     # dipotong ke 06:00
+    assert "14.03.2026 05:59:59" in tagged                            # versi 1 detik di dalam window
+    assert tagged["14.03.2026 06:00:00"] == ("2026-03-14", "Day")
+    assert tagged["14.03.2026 17:59:59"] == ("2026-03-14", "Day")
+    assert tagged["14.03.2026 18:00:00"] == ("2026-03-14", "Night")
+    assert tagged["14.03.2026 23:50:00"] == ("2026-03-14", "Night")
+    assert tagged["15.03.2026 00:05:00"] == ("2026-03-14", "Night")
+    assert tagged["15.03.2026 05:45:00"] == ("2026-03-14", "Night")
+    assert "15.03.2026 06:00:00" not in tagged
+
+
+def test_tag_production_calendar_matches_row_wise(dashboard):
+    base = pd.Timestamp("2026-03-14 00:00:00")
+    naive = pd.Series(
+        [base + pd.Timedelta(minutes=m) for m in range(0, 3 * 24 * 60, 7)]
+        + [base + pd.Timedelta(hours=h) - pd.Timedelta(seconds=s) for h in (6, 18, 30, 42) for s in (0, 1)]
+        + [pd.NaT]
+    )
+    timestamps = naive.dt.tz_localize(dashboard.TIMEZONE)
+
+    dates, shifts = dashboard.tag_production_calendar(timestamps)
+
+    assert dates.tolist() == timestamps.apply(baseline_work_day).tolist()
+    assert shifts.tolist() == timestamps.apply(baseline_work_shift).tolist()
@@ -0,0 +1,58 @@
+"""Jalur exec_report yang dipakai Load default (satu production day per report) dan increment Live Mode."""
+from datetime import timedelta
+
+import benchmark
+
+
+def load_default_range(dashboard, responder):
+    """Load H-1 seperti tombol Load / auto-load: satu production day, interval report ~31 jam."""
+    start_time, filter_end_time, _, intervals = benchmark.load_range(dashboard, responder.start_date, 1)
+    sid = dashboard.wialon_token_login()
+    resource_id = dashboard.get_resource_id(sid)
+    return dashboard.build_trip_dataframe(
+        sid, resource_id, start_time, intervals[0][0], intervals[-1][1], filter_end_time
+    )
+
+
+def test_default_load_executes_reports_async(dashboard, synthetic_wialon):
+    df = load_default_range(dashboard, synthetic_wialon)
+
+    calls = synthetic_wialon.call_counts
+    assert calls["report/exec_report"] > 0
+    assert calls["report/exec_report:remote"] == calls["report/exec_report"]
+    assert calls["report/get_report_status"] >= calls["report/exec_report"]
+    assert calls["report/apply_report_result"] == calls["report/exec_report"]
+    assert len(df) == synthetic_wialon.trip_count
+
+
+def test_sync_exec_opt_in_returns_same_trips(dashboard, synthetic_wialon, monkeypatch):
+    monkeypatch.setattr(dashboard, "REPORT_ASYNC_MIN_HOURS", 48)
+
+    df = load_default_range(dashboard, synthetic_wialon)
+
+    calls = synthetic_wialon.call_counts
+    assert calls["report/exec_report"] > 0
+    assert calls["report/exec_report:remote"] == 0
+    assert calls["report/apply_report_result"] == 0
+    assert len(df) == synthetic_wialon.trip_count
+
+
+def test_live_increment_window_executes_sync(dashboard, synthetic_wialon):
+    start_time, _, _, _ = benchmark.load_range(dashboard, synthetic_wialon.start_date, 1)
+    sid = dashboard.wialon_token_login()
+
+    rows = dashboard.fetch_group_rows(sid, dashboard.get_resource_id(sid), start_time, start_time + timedelta(minutes=15))
+
+    calls = synthetic_wialon.call_counts
+    assert calls["report/exec_report"] > 0
+    assert calls["report/exec_report:remote"] == 0
+    assert calls["report/get_report_status"] == 0
+    assert rows
+
+
+def test_small_unit_sets_execute_sync(dashboard):
+    day = 31 * 3600
+    assert dashboard.use_async_report(day, None)
+    assert dashboard.use_async_report(day, dashboard.REPORT_SYNC_MAX_UNITS + 1)
+    assert not dashboard.use_async_report(day, dashboard.REPORT_SYNC_MAX_UNITS)
+    assert not dashboard.use_async_report(15 * 60, 500)
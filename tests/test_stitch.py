@@ -0,0 +1,49 @@
+"""
+Stitch partisi production day: potongan trip di awal interval partisi berikutnya
+(trip masih berjalan saat interval dimulai) harus dibuang, trip utuh dari partisi sebelumnya dipakai.
+"""
+from datetime import datetime, timedelta
+
+from test_production_window import production_window, trip_row
+
+
+def test_fragment_starting_after_last_previous_trip_is_dropped(dashboard):
+    day = datetime(2026, 3, 14).date()
+    start_time, _ = production_window(dashboard, day)
+    next_start = start_time + timedelta(days=1)
+    filter_end_time = next_start + timedelta(days=1)
+    request_start = (next_start - timedelta(hours=dashboard.API_LOOKBACK_HOURS)).replace(tzinfo=None)
+
+    # Trip terakhir unit di partisi pertama mulai 03:43, masih berjalan saat interval partisi kedua dibuka (05:00)
+    full_trip_begin = request_start - timedelta(minutes=77)
+    first = dashboard.build_trip_frame([
+        trip_row("HD001", start_time.replace(tzinfo=None) + timedelta(hours=2), 600, 600),
+        trip_row("HD001", full_trip_begin, 3 * 3600, 900),
+    ])
+    # Partisi kedua: report memotong trip yang sama ke awal interval
+    second = dashboard.build_trip_frame([
+        trip_row("HD001", request_start, 3 * 3600 - 77 * 60, 900),
+        trip_row("HD001", next_start.replace(tzinfo=None) + timedelta(hours=3), 600, 600),
+    ])
+
+    df = dashboard.stitch_trip_frames([first, second], start_time, filter_end_time, show_toast=False)
+
+    assert len(df) == 3
+    assert request_start.strftime(dashboard.BEGINNING_FORMAT) not in set(dashboard.beginning_text(df))
+
+
+def test_trip_starting_just_after_crossing_trip_is_kept(dashboard):
+    day = datetime(2026, 3, 14).date()
+    start_time, _ = production_window(dashboard, day)
+    next_start = start_time + timedelta(days=1)
+    filter_end_time = next_start + timedelta(days=1)
+    crossing_begin = next_start.replace(tzinfo=None) - timedelta(minutes=10)
+
+    # Partisi pertama: trip 05:50 -> 06:30 menyeberang ke production day berikutnya
+    first = dashboard.build_trip_frame([trip_row("HD001", crossing_begin, 30 * 60, 10 * 60)])
+    # Partisi kedua: trip baru 30 detik setelah trip itu selesai, bukan potongan
+    second = dashboard.build_trip_frame([trip_row("HD001", crossing_begin + timedelta(minutes=40, seconds=30), 600, 60)])
+
+    df = dashboard.stitch_trip_frames([first, second], start_time, filter_end_time, show_toast=False)
+
+    assert len(df) == 2
@@ -0,0 +1,40 @@
+"""
+table_sort_order harus sama dengan sort_values(kind="stable", na_position="last") pandas:
+row seri tetap urutan asli, nilai kosong di akhir untuk kedua arah.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def sample_frame(seed=11, count=500):
+    rng = np.random.default_rng(seed)
+    units = np.array([f"HD{i:03d}" for i in range(12)], dtype=object)
+    unit = units[rng.integers(0, len(units), count)]
+    unit[rng.random(count) < 0.1] = None
+    mileage = rng.integers(0, 20, count).astype("float32")
+    mileage[rng.random(count) < 0.1] = np.nan
+    return pd.DataFrame({
+        "Unit": pd.Series(unit).astype("category"),
+        "Mileage (km)": mileage,
+        "Beginning_TS": rng.integers(0, 50, count),
+    })
+
+
+@pytest.mark.parametrize("sort_column", ["Unit", "Mileage", "Beginning"])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_table_sort_order_matches_pandas(dashboard, sort_column, ascending):
+    df = sample_frame()
+    column = dashboard.TABLE_SORT_COLUMNS[sort_column]
+    expected = df.reset_index(drop=True).sort_values(column, ascending=ascending, kind="stable", na_position="last").index
+
+    order = dashboard.table_sort_order(df, sort_column, ascending)
+
+    assert order.tolist() == expected.tolist()
+
+
+def test_missing_values_sort_last_both_directions(dashboard):
+    df = sample_frame()
+    for ascending in (True, False):
+        order = dashboard.table_sort_order(df, "Mileage", ascending)
+        assert df["Mileage (km)"].iloc[order].iloc[-int(df["Mileage (km)"].isna().sum()):].isna().all()
@@ -0,0 +1,39 @@
+"""
+SharedTripStore: range yang baru lewat 06:00 penutup masih basi sampai DAY_CLOSE_GRACE_HOURS,
+sama seperti is_production_day_closed untuk ProductionDayStore.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+def counting_loader():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return pd.DataFrame({"Unit": ["HD001"]})
+
+    return loader, calls
+
+
+def test_range_within_close_grace_is_reloaded(dashboard):
+    store = dashboard.SharedTripStore(max_entries=4, open_range_ttl_seconds=0)
+    range_end = datetime.now(dashboard.TIMEZONE) - timedelta(minutes=1)
+    loader, calls = counting_loader()
+
+    store.get_or_load("key", range_end, loader)
+    store.get_or_load("key", range_end, loader)
+
+    assert len(calls) == 2
+
+
+def test_range_past_close_grace_stays_cached(dashboard):
+    store = dashboard.SharedTripStore(max_entries=4, open_range_ttl_seconds=0)
+    range_end = datetime.now(dashboard.TIMEZONE) - timedelta(hours=dashboard.DAY_CLOSE_GRACE_HOURS, minutes=1)
+    loader, calls = counting_loader()
+
+    store.get_or_load("key", range_end, loader)
+    store.get_or_load("key", range_end, loader)
+
+    assert len(calls) == 1